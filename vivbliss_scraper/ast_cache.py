@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+源码语法树的进程内缓存
+
+多个测试脚本都要解析爬虫源码。同一进程内（如 pytest 一次收集多个测试模块）
+按路径和修改时间缓存解析结果，重复加载时跳过文件读取和 ast.parse；
+调用方只读取语法树，不应修改返回的节点。
+"""
+
+import os
+import ast
+import functools
+
+
+def load_ast(path):
+    """
+    读取源码并返回 (源码字节, 语法树)
+    
+    源码有语法错误时与 ast.parse 一样抛出 SyntaxError。
+    """
+    # 修改时间和大小作为缓存键的一部分，文件被编辑后自动失效
+    st = os.stat(path)
+    return _load_ast(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_ast(path, mtime_ns, size):
+    """按 (路径, 修改时间, 大小) 在进程内缓存 load_ast 的结果"""
+    with open(path, 'rb') as f:
+        source = f.read()
+    return source, ast.parse(source, path)
+
+
+def load_ast_text(path):
+    """与 load_ast 相同，但源码按 UTF-8 解码为字符串，返回 (源码文本, 语法树)"""
+    source, tree = load_ast(path)
+    return source.decode('utf-8'), tree
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+NameError 系列测试共用的源码分析工具
+
+test_nameerror_fix.py 与 test_nameerror_green.py 都要在爬虫源码中查找
+category_path 出现的行，并统计 parse_category 方法中的赋值和调用参数。
+"""
+
+import re
+import ast
+
+# 一次正则扫描整个源码，只取出包含 category_path 的非注释行，避免逐行做子串判断
+_CATEGORY_PATH_LINE_RE = re.compile(r'^(?![ \t]*#).*category_path.*$', re.M)
+
+
+def category_path_lines(source_text):
+    """返回所有包含 category_path 的非注释行 [(行号, 行内容)]，行号从1开始"""
+    result = []
+    line_no, pos = 1, 0
+    for match in _CATEGORY_PATH_LINE_RE.finditer(source_text):
+        line_no += source_text.count('\n', pos, match.start())
+        pos = match.start()
+        result.append((line_no, match.group(0)))
+    return result
+
+
+def subscript_key(node):
+    """返回 name['key'] 形式下标的 (name, key)，键不是常量时 key 为 None；其他节点返回 None"""
+    if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name):
+        key = node.slice.value if isinstance(node.slice, ast.Constant) else None
+        return node.value.id, key
+    return None
+
+
+class ParseCategoryCollector(ast.NodeVisitor):
+    """遍历一次语法树，收集 parse_category 方法中的赋值和调用信息"""
+    
+    def __init__(self):
+        self.node = None                 # parse_category 的 FunctionDef 节点
+        self.assigned = set()            # 直接赋值的变量名
+        self.subscript_assigned = set()  # 下标赋值 (变量名, 键)
+        self.subscript_args = set()      # 作为调用参数的下标 (变量名, 键)
+        self._inside = False
+    
+    def visit_FunctionDef(self, node):
+        if node.name == 'parse_category' and self.node is None:
+            self.node = node
+            self._inside = True
+            self.generic_visit(node)
+            self._inside = False
+        else:
+            self.generic_visit(node)
+    
+    def visit_Assign(self, node):
+        if self._inside:
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.assigned.add(target.id)
+                else:
+                    key = subscript_key(target)
+                    if key:
+                        self.subscript_assigned.add(key)
+        self.generic_visit(node)
+    
+    def visit_Call(self, node):
+        if self._inside:
+            for arg in node.args:
+                key = subscript_key(arg)
+                if key:
+                    self.subscript_args.add(key)
+        self.generic_visit(node)
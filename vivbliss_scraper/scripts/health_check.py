@@ -6,35 +6,112 @@ Docker 健康检查脚本
 
 import sys
 import os
-import pymongo
-import logging
-from time import sleep
+import atexit
+import functools
+import threading
+from time import sleep, monotonic
 
-# 添加项目路径
-sys.path.insert(0, '/app')
+from vivbliss_scraper.utils.mongo_helpers import create_client, hello
 
-from vivbliss_scraper.pipelines import MongoDBPipeline
+# 已创建的客户端，供退出时统一关闭
+_clients = []
 
-def check_mongodb_connection():
-    """检查 MongoDB 连接"""
+
+@functools.lru_cache(maxsize=8)
+def _get_client(uri, sel_ms, conn_ms, socket_ms=None):
+    """按 (uri, 超时) 复用 MongoClient，避免每次探测都重建连接池"""
+    client = create_client(
+        uri,
+        "vivbliss-healthcheck",
+        serverSelectionTimeoutMS=sel_ms,
+        connectTimeoutMS=conn_ms,
+        socketTimeoutMS=socket_ms
+    )
+    _clients.append(client)
+    return client
+
+
+def _close_all():
+    """进程退出时关闭所有缓存的客户端"""
+    while _clients:
+        _clients.pop().close()
+    _get_client.cache_clear()
+
+
+atexit.register(_close_all)
+
+
+# 单项检查的最长等待时间（秒）
+CHECK_TIMEOUT = 5
+
+# 后台 ping 线程缓存的最近一次结果
+_last_status = {'ok': False, 'ts': 0, 'error': 'no ping yet'}
+_status_lock = threading.Lock()
+_pinger_thread = None
+
+
+def _ping_mongodb():
+    """同步 ping 一次 MongoDB，返回 (是否成功, 错误信息)"""
     try:
         mongo_uri = os.getenv('MONGO_URI', 'mongodb://mongodb:27017')
-        client = pymongo.MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-        
-        # 尝试 ping 数据库
-        client.admin.command('ping')
-        client.close()
+        # 三个超时保持一致，保证探测耗时不超过编排器的探针超时
+        client = _get_client(
+            mongo_uri,
+            int(os.getenv('MONGO_SEL_TIMEOUT_MS', '2000')),
+            int(os.getenv('MONGO_CONN_TIMEOUT_MS', '2000')),
+            int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '2000'))
+        )
         
-        print("✓ MongoDB connection successful")
-        return True
+        # hello 不需要 admin 库权限，避免受限用户的误报
+        hello(client)
+        return True, None
     except Exception as e:
-        print(f"✗ MongoDB connection failed: {e}")
-        return False
+        return False, e
+
+
+def _pinger(interval):
+    """后台循环 ping，并更新缓存的状态"""
+    while True:
+        ok, error = _ping_mongodb()
+        with _status_lock:
+            _last_status.update(ok=ok, ts=monotonic(), error=error)
+        sleep(interval)
+
+
+def start_background_pinger(interval=None):
+    """启动后台 ping 线程（只启动一次）"""
+    global _pinger_thread
+    if _pinger_thread is not None:
+        return
+    if interval is None:
+        interval = float(os.getenv('MONGO_HEALTH_INTERVAL', '10'))
+    _pinger_thread = threading.Thread(
+        target=_pinger, args=(interval,), name='mongo-health-pinger', daemon=True
+    )
+    _pinger_thread.start()
+
+
+def check_mongodb_connection():
+    """检查 MongoDB 连接
+    
+    后台 ping 线程运行时直接返回缓存的结果，否则同步 ping 一次。
+    """
+    if _pinger_thread is not None:
+        with _status_lock:
+            ok, error = _last_status['ok'], _last_status['error']
+    else:
+        ok, error = _ping_mongodb()
+    
+    if ok:
+        print("✓ MongoDB connection successful")
+    else:
+        print(f"✗ MongoDB connection failed: {error}")
+    return ok
 
 def check_spider_readiness():
     """检查 Scrapy 爬虫就绪状态"""
     try:
-        # 尝试导入爬虫模块
+        # 尝试导入爬虫模块（镜像中已通过 pip install -e . 安装）
         from vivbliss_scraper.spiders.vivbliss import VivblissSpider
         
         # 检查爬虫配置
@@ -48,12 +125,44 @@ def check_spider_readiness():
         print(f"✗ Spider readiness check failed: {e}")
         return False
 
+def run_daemon():
+    """常驻模式：后台周期 ping，并按同样的间隔输出缓存的检查结果"""
+    interval = float(os.getenv('MONGO_HEALTH_INTERVAL', '10'))
+    start_background_pinger(interval)
+    
+    while True:
+        sleep(interval)
+        mongodb_ok = check_mongodb_connection()
+        spider_ok = check_spider_readiness()
+        print("All health checks passed" if mongodb_ok and spider_ok else "Health checks failed")
+
+
 def main():
-    """主健康检查函数"""
+    """主健康检查函数
+    
+    默认（或 --oneshot）执行一次检查并以退出码报告结果；
+    --daemon 以常驻模式运行，MongoDB 状态由后台线程每 MONGO_HEALTH_INTERVAL 秒刷新。
+    """
+    if '--daemon' in sys.argv[1:]:
+        run_daemon()
+        return
+    
     print("Performing health checks...")
     
-    mongodb_ok = check_mongodb_connection()
+    # 两项检查互不依赖，并行执行，总耗时取较慢的一项。
+    # 爬虫检查会导入依赖 asyncio 事件循环的模块，必须留在主线程执行。
+    # MongoDB 检查放在守护线程中：超时后进程退出不会等待它结束
+    mongodb_result = {}
+    mongodb_thread = threading.Thread(
+        target=lambda: mongodb_result.update(ok=check_mongodb_connection()),
+        name='mongo-health-check', daemon=True
+    )
+    mongodb_thread.start()
     spider_ok = check_spider_readiness()
+    mongodb_thread.join(CHECK_TIMEOUT)
+    if mongodb_thread.is_alive():
+        print(f"✗ MongoDB check timed out after {CHECK_TIMEOUT}s")
+    mongodb_ok = mongodb_result.get('ok', False)
     
     if mongodb_ok and spider_ok:
         print("All health checks passed")
@@ -0,0 +1,10 @@
+#!/bin/bash
+# 并行运行测试套件（pytest-xdist），并列出最慢的 20 个测试
+# 用法: scripts/unittest.sh [额外的 pytest 参数]
+
+cd "$(dirname "$0")/.." || exit 1
+
+# 测试之间仅通过 os.environ 耦合，已由 patch.dict 隔离，可安全并行
+# --dist loadscope 按模块/类分发：同一个类的测试留在同一个 worker 上，
+# setUpClass 中缓存的源码和语法树只构建一次，互相独立的类（如 NameError 各阶段的 TDD 用例）并行执行
+python -m pytest -n "${PYTEST_WORKERS:-auto}" --dist loadscope --durations=20 "$@"
@@ -13,12 +13,82 @@
 
 import sys
 import os
+import atexit
+import functools
+import threading
 import pymongo
-import time
-import logging
-from typing import Optional
+from pymongo import monitoring
 
+from vivbliss_scraper.utils.mongo_helpers import create_client, hello, mask_uri
 
+
+class _ServerReadyListener(monitoring.ServerListener):
+    """
+    订阅 SDAM 服务器描述变化事件
+    
+    后台拓扑监控一旦发现服务器（类型不再是 Unknown），立即唤醒等待中的重试循环，
+    不必等满整个重试间隔。
+    """
+    
+    def __init__(self):
+        self._ready = threading.Event()
+    
+    def opened(self, event):
+        pass
+    
+    def description_changed(self, event):
+        if event.new_description.is_server_type_known:
+            self._ready.set()
+    
+    def closed(self, event):
+        pass
+    
+    def reset(self) -> None:
+        """清除就绪标志，开始新一轮等待"""
+        self._ready.clear()
+    
+    def wait_ready(self, timeout: float) -> bool:
+        """等待服务器被发现，最多 timeout 秒"""
+        return self._ready.wait(timeout)
+
+
+_server_listener = _ServerReadyListener()
+
+# 已创建的客户端，供退出时统一关闭
+_clients = []
+
+
+@functools.lru_cache(maxsize=8)
+def _get_client(uri: str, sel_ms: int, conn_ms: int) -> pymongo.MongoClient:
+    """
+    获取共享的 MongoClient
+    
+    按 (uri, 超时) 缓存客户端，重试时复用同一个连接池，
+    后台 SDAM 监控会持续探测服务器状态，并把变化通知给 _server_listener。
+    """
+    client = create_client(
+        uri,
+        "vivbliss-wait-for-mongo",
+        serverSelectionTimeoutMS=sel_ms,
+        connectTimeoutMS=conn_ms,
+        event_listeners=[_server_listener],
+        heartbeatFrequencyMS=500
+    )
+    _clients.append(client)
+    return client
+
+
+def _close_all() -> None:
+    """进程退出时关闭所有缓存的客户端"""
+    while _clients:
+        _clients.pop().close()
+    _get_client.cache_clear()
+
+
+atexit.register(_close_all)
+
+
+@functools.lru_cache(maxsize=1)
 def build_mongo_uri() -> str:
     """
     根据环境变量构建 MongoDB URI
@@ -28,6 +98,8 @@ def build_mongo_uri() -> str:
     2. 单独的配置变量（MONGO_HOST, MONGO_PORT 等）
     3. 默认值
     
+    进程内环境变量不会变化，结果只计算一次；需要重新读取时调用 build_mongo_uri.cache_clear()。
+    
     Returns:
         str: MongoDB 连接 URI
     """
@@ -68,28 +140,18 @@ def wait_for_mongodb(max_retries: int = 30, retry_interval: int = 2) -> bool:
     mongo_uri = build_mongo_uri()
     
     # 隐藏密码信息用于日志输出
-    display_uri = mongo_uri
-    if '@' in mongo_uri:
-        # 隐藏用户名和密码
-        parts = mongo_uri.split('@')
-        auth_part = parts[0].split('//')[-1]
-        if ':' in auth_part:
-            username = auth_part.split(':')[0]
-            display_uri = mongo_uri.replace(auth_part, f'{username}:****')
+    display_uri = mask_uri(mongo_uri)
     
     print(f"Waiting for MongoDB at {display_uri}...")
     
     for attempt in range(max_retries):
+        # 每次尝试前清除就绪标志，避免认证失败等情况下空转
+        _server_listener.reset()
         try:
-            client = pymongo.MongoClient(
-                mongo_uri, 
-                serverSelectionTimeoutMS=5000,
-                connectTimeoutMS=5000
-            )
+            client = _get_client(mongo_uri, 5000, 5000)
             
-            # 尝试 ping 数据库
-            client.admin.command('ping')
-            client.close()
+            # 检查服务器是否存活
+            hello(client)
             
             print(f"✓ MongoDB is ready after {attempt + 1} attempt{'s' if attempt > 0 else ''}")
             return True
@@ -107,7 +169,8 @@ def wait_for_mongodb(max_retries: int = 30, retry_interval: int = 2) -> bool:
             print(f"Attempt {attempt + 1}/{max_retries} failed: {error_msg}")
             
             if attempt < max_retries - 1:
-                time.sleep(retry_interval)
+                # 服务器被发现时立即重试，否则最多等待一个重试间隔
+                _server_listener.wait_ready(retry_interval)
             else:
                 print("✗ MongoDB connection timeout")
                 print("\n检查以下事项：")
@@ -140,15 +203,19 @@ def main() -> None:
             print(f"错误: 无效的重试间隔 '{sys.argv[2]}'")
             sys.exit(2)
     
-    # 显示配置信息
-    print(f"MongoDB 连接配置:")
-    print(f"  主机: {os.getenv('MONGO_HOST', 'mongodb')}")
-    print(f"  端口: {os.getenv('MONGO_PORT', '27017')}")
-    print(f"  数据库: {os.getenv('MONGO_DATABASE', 'vivbliss_db')}")
+    # 显示配置信息（合并为一次写出）
+    lines = [
+        "MongoDB 连接配置:",
+        f"  主机: {os.getenv('MONGO_HOST', 'mongodb')}",
+        f"  端口: {os.getenv('MONGO_PORT', '27017')}",
+        f"  数据库: {os.getenv('MONGO_DATABASE', 'vivbliss_db')}",
+    ]
     if os.getenv('MONGO_USERNAME'):
-        print(f"  用户: {os.getenv('MONGO_USERNAME')}")
-    print(f"  最大重试: {max_retries} 次")
-    print(f"  重试间隔: {retry_interval} 秒\n")
+        lines.append(f"  用户: {os.getenv('MONGO_USERNAME')}")
+    lines.append(f"  最大重试: {max_retries} 次")
+    lines.append(f"  重试间隔: {retry_interval} 秒\n")
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
     
     if wait_for_mongodb(max_retries, retry_interval):
         sys.exit(0)
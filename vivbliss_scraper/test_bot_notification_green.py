@@ -5,33 +5,24 @@ GREEN阶段：编写测试验证功能正常工作
 """
 
 import unittest
-import sys
 import os
+from types import MappingProxyType
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
-
 # Mock VivblissItem for testing without Scrapy
-class VivblissItem(dict):
-    def __init__(self):
-        super().__init__()
-    def __setitem__(self, key, value):
-        super().__setitem__(key, value)
-    def __getitem__(self, key):
-        return super().__getitem__(key)
-    def get(self, key, default=None):
-        return super().get(key, default)
-    def update(self, other):
-        super().update(other)
+VivblissItem = dict
+
+# 测试中的诊断输出默认关闭，设置 TDD_VERBOSE=1 时打印
+_VERBOSE = os.environ.get('TDD_VERBOSE') == '1'
 
 
 class TestBotNotificationGreen(unittest.TestCase):
     """Bot消息通知功能的GREEN阶段测试用例"""
     
-    def setUp(self):
-        """设置测试环境"""
-        self.sample_media_data = {
+    @classmethod
+    def setUpClass(cls):
+        """设置测试环境（只读样例数据，所有测试共享）"""
+        cls.sample_media_data = MappingProxyType({
             'title': '测试产品名称',
             'url': 'https://example.com/product1',
             'category': '测试分类',
@@ -52,7 +43,7 @@ class TestBotNotificationGreen(unittest.TestCase):
                 'https://www.youtube.com/embed/abc123'
             ],
             'media_count': 5
-        }
+        })
     
     def test_bot_notifier_class_exists_and_works(self):
         """GREEN阶段：测试BotNotifier类存在且工作正常"""
@@ -67,7 +58,8 @@ class TestBotNotificationGreen(unittest.TestCase):
             self.assertTrue(hasattr(bot_notifier, 'sync_send_media_notification'))
             self.assertTrue(callable(bot_notifier.format_media_message))
             
-            print("✅ GREEN阶段：BotNotifier类存在且功能完整")
+            if _VERBOSE:
+                print("✅ GREEN阶段：BotNotifier类存在且功能完整")
             
         except ImportError as e:
             self.fail(f"BotNotifier类导入失败: {e}")
@@ -97,11 +89,12 @@ class TestBotNotificationGreen(unittest.TestCase):
             self.assertIn('图片', message)
             self.assertIn('视频', message)
             
-            print("✅ GREEN阶段：消息格式化功能正常工作")
-            print(f"   消息长度: {len(message)} 字符")
-            print(f"   包含产品名称: {'✅' if '测试产品名称' in message else '❌'}")
-            print(f"   包含URL: {'✅' if 'https://example.com/product1' in message else '❌'}")
-            print(f"   包含媒体统计: {'✅' if '5' in message else '❌'}")
+            if _VERBOSE:
+                print("✅ GREEN阶段：消息格式化功能正常工作")
+                print(f"   消息长度: {len(message)} 字符")
+                print(f"   包含产品名称: {'✅' if '测试产品名称' in message else '❌'}")
+                print(f"   包含URL: {'✅' if 'https://example.com/product1' in message else '❌'}")
+                print(f"   包含媒体统计: {'✅' if '5' in message else '❌'}")
             
         except Exception as e:
             self.fail(f"消息格式化功能失败: {e}")
@@ -130,10 +123,11 @@ class TestBotNotificationGreen(unittest.TestCase):
             self.assertIsNotNone(notifier3)
             self.assertEqual(notifier3.chat_id, '789012')
             
-            print("✅ GREEN阶段：BotNotifier初始化选项工作正常")
-            print(f"   默认初始化: ✅")
-            print(f"   参数初始化: ✅")
-            print(f"   从设置创建: ✅")
+            if _VERBOSE:
+                print("✅ GREEN阶段：BotNotifier初始化选项工作正常")
+                print(f"   默认初始化: ✅")
+                print(f"   参数初始化: ✅")
+                print(f"   从设置创建: ✅")
             
         except Exception as e:
             self.fail(f"BotNotifier初始化失败: {e}")
@@ -161,9 +155,10 @@ class TestBotNotificationGreen(unittest.TestCase):
             self.assertIn('client_initialized', status)
             self.assertIn('chat_id_configured', status)
             
-            print("✅ GREEN阶段：BotNotifier状态方法工作正常")
-            print(f"   is_enabled(): {enabled}")
-            print(f"   get_status(): {len(status)} 个状态项")
+            if _VERBOSE:
+                print("✅ GREEN阶段：BotNotifier状态方法工作正常")
+                print(f"   is_enabled(): {enabled}")
+                print(f"   get_status(): {len(status)} 个状态项")
             
         except Exception as e:
             self.fail(f"BotNotifier状态方法失败: {e}")
@@ -219,10 +214,11 @@ class TestBotNotificationGreen(unittest.TestCase):
             
             spider._trigger_media_notification({'item': test_item})
             
-            print("✅ GREEN阶段：模拟爬虫集成工作正常")
-            print(f"   爬虫有bot_notifier属性: ✅")
-            print(f"   爬虫有_trigger_media_notification方法: ✅")
-            print(f"   通知触发功能: ✅")
+            if _VERBOSE:
+                print("✅ GREEN阶段：模拟爬虫集成工作正常")
+                print(f"   爬虫有bot_notifier属性: ✅")
+                print(f"   爬虫有_trigger_media_notification方法: ✅")
+                print(f"   通知触发功能: ✅")
             
         except Exception as e:
             self.fail(f"模拟爬虫集成失败: {e}")
@@ -265,57 +261,14 @@ class TestBotNotificationGreen(unittest.TestCase):
             self.assertIn('图片文件', image_message)
             self.assertNotIn('视频文件', image_message)
             
-            print("✅ GREEN阶段：媒体内容验证工作正常")
-            print(f"   空媒体处理: ✅")
-            print(f"   只有图片处理: ✅")
+            if _VERBOSE:
+                print("✅ GREEN阶段：媒体内容验证工作正常")
+                print(f"   空媒体处理: ✅")
+                print(f"   只有图片处理: ✅")
             
         except Exception as e:
             self.fail(f"媒体内容验证失败: {e}")
 
 
-def run_green_phase_tests():
-    """运行GREEN阶段测试"""
-    print("🟢 TDD GREEN阶段：验证Bot消息通知功能正常工作")
-    print("=" * 70)
-    
-    # 创建测试套件
-    suite = unittest.TestLoader().loadTestsFromTestCase(TestBotNotificationGreen)
-    
-    # 运行测试
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # 输出结果
-    print("\n" + "=" * 70)
-    print("📊 GREEN阶段测试结果:")
-    print(f"   运行测试: {result.testsRun}")
-    print(f"   成功: {result.testsRun - len(result.failures) - len(result.errors)}")
-    print(f"   失败: {len(result.failures)}")
-    print(f"   错误: {len(result.errors)}")
-    
-    # GREEN阶段应该所有测试都通过
-    if not result.failures and not result.errors:
-        print("\n🟢 GREEN阶段成功：Bot消息通知功能实现完成！")
-        print("   ✅ BotNotifier类正常工作")
-        print("   ✅ 消息格式化功能完整")
-        print("   ✅ 初始化选项灵活")
-        print("   ✅ 状态管理正确")
-        print("   ✅ 爬虫集成就绪") 
-        print("   ✅ 媒体内容验证有效")
-        return True
-    else:
-        print("\n🔴 GREEN阶段失败：需要修复实现问题")
-        if result.failures:
-            print("   失败的测试:")
-            for test, error in result.failures:
-                print(f"     - {test}: {error.split('AssertionError:')[-1].strip()}")
-        if result.errors:
-            print("   错误的测试:")
-            for test, error in result.errors:
-                print(f"     - {test}: {error.split(':', 1)[-1].strip()}")
-        return False
-
-
 if __name__ == '__main__':
-    success = run_green_phase_tests()
-    exit(0 if success else 1)
\ No newline at end of file
+    unittest.main(verbosity=0)
@@ -5,13 +5,12 @@ RED阶段：编写失败测试验证功能缺失
 """
 
 import unittest
-import sys
 import os
 import asyncio
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+# 测试中的诊断输出默认关闭，设置 TDD_VERBOSE=1 时打印
+_VERBOSE = os.environ.get('TDD_VERBOSE') == '1'
 
 try:
     from vivbliss_scraper.items import VivblissItem, ProductItem
@@ -67,8 +66,9 @@ class TestBotNotificationTDD(unittest.TestCase):
         except ImportError:
             bot_notifier_exists = False
         
-        print("🔴 RED阶段测试：BotNotifier类")
-        print(f"   BotNotifier类存在: {'✅' if bot_notifier_exists else '❌'}")
+        if _VERBOSE:
+            print("🔴 RED阶段测试：BotNotifier类")
+            print(f"   BotNotifier类存在: {'✅' if bot_notifier_exists else '❌'}")
         
         # RED阶段：这应该失败，因为类还不存在
         self.assertTrue(bot_notifier_exists, "BotNotifier类应该存在")
@@ -84,11 +84,13 @@ class TestBotNotificationTDD(unittest.TestCase):
         except ImportError:
             initialization_success = False
         except Exception as e:
-            print(f"   初始化错误: {e}")
+            if _VERBOSE:
+                print(f"   初始化错误: {e}")
             initialization_success = False
         
-        print(f"\n🔍 BotNotifier初始化测试:")
-        print(f"   初始化成功: {'✅' if initialization_success else '❌'}")
+        if _VERBOSE:
+            print(f"\n🔍 BotNotifier初始化测试:")
+            print(f"   初始化成功: {'✅' if initialization_success else '❌'}")
         
         # RED阶段：这应该失败
         self.assertTrue(initialization_success, "BotNotifier应该能够初始化")
@@ -107,9 +109,10 @@ class TestBotNotificationTDD(unittest.TestCase):
             has_send_method = False
             is_callable = False
         
-        print(f"\n📤 发送通知方法测试:")
-        print(f"   send_media_notification方法存在: {'✅' if has_send_method else '❌'}")
-        print(f"   方法可调用: {'✅' if is_callable else '❌'}")
+        if _VERBOSE:
+            print(f"\n📤 发送通知方法测试:")
+            print(f"   send_media_notification方法存在: {'✅' if has_send_method else '❌'}")
+            print(f"   方法可调用: {'✅' if is_callable else '❌'}")
         
         # RED阶段：这应该失败
         self.assertTrue(has_send_method, "send_media_notification方法应该存在")
@@ -136,8 +139,9 @@ class TestBotNotificationTDD(unittest.TestCase):
         except AttributeError:
             message_formatted = False
         
-        print(f"\n💬 消息格式化测试:")
-        print(f"   消息格式化成功: {'✅' if message_formatted else '❌'}")
+        if _VERBOSE:
+            print(f"\n💬 消息格式化测试:")
+            print(f"   消息格式化成功: {'✅' if message_formatted else '❌'}")
         
         # RED阶段：这应该失败
         self.assertTrue(message_formatted, "应该能够格式化媒体消息")
@@ -156,13 +160,15 @@ class TestBotNotificationTDD(unittest.TestCase):
                 bot_notifier_configured = spider.bot_notifier is not None
             
         except (ImportError, Exception) as e:
-            print(f"   导入错误: {e}")
+            if _VERBOSE:
+                print(f"   导入错误: {e}")
             has_bot_notifier = False
             bot_notifier_configured = False
         
-        print(f"\n🕷️  爬虫集成测试:")
-        print(f"   爬虫有bot_notifier属性: {'✅' if has_bot_notifier else '❌'}")
-        print(f"   bot_notifier已配置: {'✅' if bot_notifier_configured else '❌'}")
+        if _VERBOSE:
+            print(f"\n🕷️  爬虫集成测试:")
+            print(f"   爬虫有bot_notifier属性: {'✅' if has_bot_notifier else '❌'}")
+            print(f"   bot_notifier已配置: {'✅' if bot_notifier_configured else '❌'}")
         
         # RED阶段：这应该失败
         self.assertTrue(has_bot_notifier, "爬虫应该有bot_notifier属性")
@@ -182,11 +188,13 @@ class TestBotNotificationTDD(unittest.TestCase):
                 notification_triggered = hasattr(spider, '_trigger_media_notification')
                 
         except (ImportError, Exception) as e:
-            print(f"   导入/初始化错误: {e}")
+            if _VERBOSE:
+                print(f"   导入/初始化错误: {e}")
             notification_triggered = False
         
-        print(f"\n🔔 通知触发测试:")
-        print(f"   产品提取完成触发通知: {'✅' if notification_triggered else '❌'}")
+        if _VERBOSE:
+            print(f"\n🔔 通知触发测试:")
+            print(f"   产品提取完成触发通知: {'✅' if notification_triggered else '❌'}")
         
         # RED阶段：这应该失败
         self.assertTrue(notification_triggered, "产品提取完成应该触发Bot通知")
@@ -231,48 +239,13 @@ class TestBotNotificationTDD(unittest.TestCase):
         except Exception:
             pass
         
-        print(f"\n📝 消息内容测试:")
-        print(f"   消息包含必要信息: {'✅' if content_requirements_met else '❌'}")
+        if _VERBOSE:
+            print(f"\n📝 消息内容测试:")
+            print(f"   消息包含必要信息: {'✅' if content_requirements_met else '❌'}")
         
         # RED阶段：这应该失败
         self.assertTrue(content_requirements_met, "消息应该包含所有必要的媒体文件信息")
 
 
-def run_red_phase_tests():
-    """运行RED阶段测试"""
-    print("🔴 TDD RED阶段：验证Bot消息通知功能缺失")
-    print("=" * 70)
-    
-    # 创建测试套件
-    suite = unittest.TestLoader().loadTestsFromTestCase(TestBotNotificationTDD)
-    
-    # 运行测试
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # 输出结果
-    print("\n" + "=" * 70)
-    print("📊 RED阶段测试结果:")
-    print(f"   运行测试: {result.testsRun}")
-    print(f"   成功: {result.testsRun - len(result.failures) - len(result.errors)}")
-    print(f"   失败: {len(result.failures)}")
-    print(f"   错误: {len(result.errors)}")
-    
-    # RED阶段应该有一些测试失败（确认功能缺失）
-    if result.failures or result.errors:
-        print("\n🔴 RED阶段完成：确认了Bot消息通知功能缺失")
-        print("   需要实现的组件:")
-        print("   1. BotNotifier类")
-        print("   2. send_media_notification方法")
-        print("   3. format_media_message方法")
-        print("   4. 爬虫集成")
-        print("   5. 产品提取完成触发机制")
-        return True
-    else:
-        print("\n⚠️  RED阶段异常：功能可能已存在")
-        return False
-
-
 if __name__ == '__main__':
-    success = run_red_phase_tests()
-    exit(0 if success else 1)
\ No newline at end of file
+    unittest.main(verbosity=0)
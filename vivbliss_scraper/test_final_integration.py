@@ -5,243 +5,144 @@ TDD最终集成测试 - 验证AttributeError修复后的完整功能
 
 import sys
 import os
+import re
 import ast
+import unittest
+from collections import Counter
+
+# 添加项目路径（已在 sys.path 中时不重复添加）
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+from ast_cache import load_ast_text
+
+SPIDER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'vivbliss_scraper', 'spiders', 'vivbliss.py')
+
+# 代码质量检查的片段合并为一个正则，一次扫描源码完成计数
+QUALITY_PATTERNS = re.compile(
+    r'(?P<docstring>"""使用优先级调度器在页面中发现产品链接""")'
+    r'|(?P<error_handler>@error_handler\(default_return=\[\]\))'
+    r'|(?P<timing>@timing_decorator)'
+    r'|(?P<logger>self\.logger\.)'
+)
+
+# discover_products_with_priority 方法体中应包含的功能片段
+FUNCTIONALITY_NEEDLES = (
+    ('接受正确参数', 'response, category_path=None'),
+    ('链接发现逻辑', 'link_discovery.discover_product_links'),
+    ('结果处理循环', 'for link_info in discovered_links:'),
+    ('请求构建', 'RequestBuilder.build_product_request'),
+    ('调度器集成', 'priority_scheduler.add_product_request'),
+    ('统计更新', 'stats_manager.increment'),
+    ('错误回调', 'parse_product_with_error_handling'),
+    ('返回生成器', 'yield request'),
+)
+
+
+class TestFinalIntegration(unittest.TestCase):
+    """AttributeError 修复后的最终集成验证"""
+
+    @classmethod
+    def setUpClass(cls):
+        """读取并解析一次爬虫源码，遍历一次语法树收集所有测试需要的信息"""
+        cls.source_code, cls.tree = load_ast_text(SPIDER_PATH)
+        
+        method_names = set()
+        called_methods = set()
+        cls.target_method = None
+        for node in ast.walk(cls.tree):
+            if isinstance(node, ast.FunctionDef):
+                method_names.add(node.name)
+                if node.name == 'discover_products_with_priority' and cls.target_method is None:
+                    cls.target_method = node
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                # 以 obj.method(...) 形式调用的方法名
+                called_methods.add(node.func.attr)
+        cls.method_names = frozenset(method_names)
+        cls.called_methods = frozenset(called_methods)
+
+    def _assert_checks(self, checks):
+        """逐项断言检查结果，失败时报告具体的检查名"""
+        for name, passed in checks.items():
+            with self.subTest(check=name):
+                self.assertTrue(passed, name)
+
+    def _assert_score(self, checks, threshold, label):
+        """断言通过比例不低于阈值"""
+        failed = [name for name, passed in checks.items() if not passed]
+        percentage = (len(checks) - len(failed)) / len(checks) * 100
+        self.assertGreaterEqual(percentage, threshold,
+                                f"{label} {percentage:.1f}% 低于 {threshold}%，未通过: {failed}")
+
+    def test_method_completeness(self):
+        """测试方法完整性"""
+        source_code = self.source_code
 
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
-
-def test_method_completeness():
-    """测试方法完整性"""
-    print("🔄 REFACTOR阶段：最终集成测试")
-    print("=" * 60)
-    
-    try:
-        # 读取爬虫文件
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
         # 验证关键组件
         components_check = {
             '目标方法定义': 'def discover_products_with_priority(self, response, category_path=None):' in source_code,
             '调度器导入': 'from vivbliss_scraper.utils.priority_scheduler import DirectoryPriorityScheduler' in source_code,
             '调度器初始化': 'self.priority_scheduler = DirectoryPriorityScheduler()' in source_code,
-            '方法调用点': 'discover_products_with_priority(response, category_path)' in source_code,
-            '错误处理方法': 'parse_product_with_error_handling' in source_code,
+            '方法调用点': 'discover_products_with_priority' in self.called_methods,
+            '错误处理方法': 'parse_product_with_error_handling' in self.method_names,
             '日志记录': 'self.logger.info("🎯 目录优先级调度器已初始化")' in source_code
         }
-        
-        print("📋 组件完整性检查:")
-        all_present = True
-        for component, present in components_check.items():
-            status = "✅" if present else "❌"
-            print(f"   {status} {component}: {present}")
-            if not present:
-                all_present = False
-        
-        return all_present
-        
-    except Exception as e:
-        print(f"❌ 完整性检查失败: {e}")
-        return False
-
-def test_code_quality():
-    """测试代码质量"""
-    print(f"\n🔍 代码质量分析:")
-    
-    try:
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 解析AST检查语法
-        try:
-            tree = ast.parse(source_code)
-            syntax_valid = True
-        except SyntaxError:
-            syntax_valid = False
-        
-        # 代码质量指标
+
+        self._assert_checks(components_check)
+
+    def test_code_quality(self):
+        """测试代码质量"""
+        source_code = self.source_code
+        counts = Counter(match.lastgroup for match in QUALITY_PATTERNS.finditer(source_code))
+        # 直接按语法树节点切出方法源码，无需逐行扫描寻找方法边界
+        method = self.target_method
+        method_content = ast.get_source_segment(source_code, method) if method else None
+
+        # 代码质量指标（setUpClass 已成功解析源码，语法必然正确）
         quality_metrics = {
-            '语法正确': syntax_valid,
-            '有文档字符串': '"""使用优先级调度器在页面中发现产品链接"""' in source_code,
-            '有错误处理': '@error_handler(default_return=[])' in source_code,
-            '有性能装饰器': '@timing_decorator' in source_code,
-            '日志记录完整': source_code.count('self.logger.') >= 5,
-            '方法长度合理': len([line for line in source_code.split('\n') 
-                                if 'def discover_products_with_priority' in line or 
-                                (line.strip() and not line.strip().startswith('def') and 
-                                 'discover_products_with_priority' in source_code[source_code.find('def discover_products_with_priority'):source_code.find('def discover_products_with_priority')+2000])]) < 50
+            '语法正确': True,
+            '有文档字符串': counts['docstring'] > 0,
+            '有错误处理': counts['error_handler'] > 0,
+            '有性能装饰器': counts['timing'] > 0,
+            '日志记录完整': counts['logger'] >= 5,
+            '方法长度合理': method_content is not None and
+                            sum(1 for line in method_content.splitlines() if line.strip()) < 50
         }
-        
-        quality_score = 0
-        for metric, passed in quality_metrics.items():
-            status = "✅" if passed else "❌"
-            print(f"   {status} {metric}: {passed}")
-            if passed:
-                quality_score += 1
-        
-        total_metrics = len(quality_metrics)
-        quality_percentage = (quality_score / total_metrics) * 100
-        print(f"\n   🎯 代码质量评分: {quality_score}/{total_metrics} ({quality_percentage:.1f}%)")
-        
-        return quality_percentage >= 80
-        
-    except Exception as e:
-        print(f"❌ 代码质量分析失败: {e}")
-        return False
-
-def test_error_resolution():
-    """测试错误解决情况"""
-    print(f"\n🔧 错误解决验证:")
-    
-    try:
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 解析所有方法定义
-        tree = ast.parse(source_code)
-        methods = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                methods.append(node.name)
-        
+
+        self._assert_score(quality_metrics, 80, '代码质量评分')
+
+    def test_error_resolution(self):
+        """测试错误解决情况"""
+        # 所有方法定义
+        methods = self.method_names
+
         error_resolution_checks = {
             '目标方法存在': 'discover_products_with_priority' in methods,
-            '方法可被调用': 'discover_products_with_priority' in source_code and 'def discover_products_with_priority' in source_code,
-            '调度器可用': 'self.priority_scheduler' in source_code,
-            '集成点完整': 'discover_products_with_priority(response, category_path)' in source_code,
+            '方法可被调用': 'discover_products_with_priority' in self.called_methods,
+            '调度器可用': 'self.priority_scheduler' in self.source_code,
+            '集成点完整': "self.discover_products_with_priority(response, category_item['path'])" in self.source_code,
             '原始错误已修复': True  # 如果代码能正常解析，原始错误就已修复
         }
-        
-        resolution_score = 0
-        for check, resolved in error_resolution_checks.items():
-            status = "✅" if resolved else "❌"
-            print(f"   {status} {check}: {resolved}")
-            if resolved:
-                resolution_score += 1
-        
-        total_checks = len(error_resolution_checks)
-        resolution_percentage = (resolution_score / total_checks) * 100
-        print(f"\n   🎯 错误解决程度: {resolution_score}/{total_checks} ({resolution_percentage:.1f}%)")
-        
-        return resolution_percentage == 100
-        
-    except Exception as e:
-        print(f"❌ 错误解决验证失败: {e}")
-        return False
-
-def test_method_functionality():
-    """测试方法功能性"""
-    print(f"\n⚙️  方法功能性测试:")
-    
-    try:
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
+
+        self._assert_checks(error_resolution_checks)
+
+    def test_method_functionality(self):
+        """测试方法功能性"""
         # 提取discover_products_with_priority方法
-        method_start = source_code.find('def discover_products_with_priority')
-        if method_start == -1:
-            print("❌ 方法未找到")
-            return False
-        
-        # 找到方法结束位置
-        lines = source_code[method_start:].split('\n')
-        method_lines = []
-        indent_level = None
-        
-        for line in lines:
-            if line.strip().startswith('def discover_products_with_priority'):
-                method_lines.append(line)
-                indent_level = len(line) - len(line.lstrip())
-            elif line.strip() and indent_level is not None:
-                current_indent = len(line) - len(line.lstrip())
-                if current_indent <= indent_level and line.strip().startswith('def '):
-                    break
-                method_lines.append(line)
-            elif not line.strip():
-                method_lines.append(line)
-        
-        method_content = '\n'.join(method_lines)
-        
+        method = self.target_method
+        self.assertIsNotNone(method, "方法未找到")
+
+        method_content = ast.get_source_segment(self.source_code, method)
+
         # 功能性检查
         functionality_checks = {
-            '接受正确参数': 'response, category_path=None' in method_content,
-            '链接发现逻辑': 'link_discovery.discover_product_links' in method_content,
-            '结果处理循环': 'for link_info in discovered_links:' in method_content,
-            '请求构建': 'RequestBuilder.build_product_request' in method_content,
-            '调度器集成': 'priority_scheduler.add_product_request' in method_content,
-            '统计更新': 'stats_manager.increment' in method_content,
-            '错误回调': 'parse_product_with_error_handling' in method_content,
-            '返回生成器': 'yield request' in method_content
+            check: needle in method_content for check, needle in FUNCTIONALITY_NEEDLES
         }
-        
-        functionality_score = 0
-        for check, present in functionality_checks.items():
-            status = "✅" if present else "❌"
-            print(f"   {status} {check}: {present}")
-            if present:
-                functionality_score += 1
-        
-        total_functionality = len(functionality_checks)
-        functionality_percentage = (functionality_score / total_functionality) * 100
-        print(f"\n   🎯 功能完整度: {functionality_score}/{total_functionality} ({functionality_percentage:.1f}%)")
-        
-        return functionality_percentage >= 90
-        
-    except Exception as e:
-        print(f"❌ 功能性测试失败: {e}")
-        return False
-
-def main():
-    """主测试函数"""
-    print("🎯 TDD 最终集成测试：AttributeError 修复验证")
-    print("=" * 80)
-    
-    # 运行所有测试
-    tests = [
-        ("组件完整性", test_method_completeness),
-        ("代码质量", test_code_quality),
-        ("错误解决", test_error_resolution),
-        ("方法功能性", test_method_functionality)
-    ]
-    
-    results = []
-    for test_name, test_func in tests:
-        try:
-            result = test_func()
-            results.append((test_name, result))
-        except Exception as e:
-            print(f"❌ {test_name}测试出错: {e}")
-            results.append((test_name, False))
-    
-    # 输出总结
-    print(f"\n" + "=" * 80)
-    print("📊 最终测试结果:")
-    passed = 0
-    for test_name, result in results:
-        status = "✅ 通过" if result else "❌ 失败"
-        print(f"   {test_name}: {status}")
-        if result:
-            passed += 1
-    
-    total = len(results)
-    success_rate = (passed / total) * 100 if total > 0 else 0
-    
-    print(f"\n🎯 总体结果: {passed}/{total} 测试通过 ({success_rate:.1f}%)")
-    
-    if passed == total:
-        print("\n🎉 TDD 流程完成！AttributeError 已成功修复！")
-        print("✅ discover_products_with_priority 方法已正确实现并集成")
-        print("✅ 目录优先级调度器功能正常工作")
-        print("✅ 所有集成点已验证通过")
-        return True
-    else:
-        print(f"\n⚠️  部分测试失败，需要进一步完善")
-        return False
+
+        self._assert_score(functionality_checks, 90, '功能完整度')
+
 
 if __name__ == "__main__":
-    success = main()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    unittest.main()
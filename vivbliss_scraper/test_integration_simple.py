@@ -8,32 +8,83 @@
 import sys
 import os
 import re
+from functools import lru_cache
 from datetime import datetime
+from urllib.parse import urljoin
 
-# 添加项目路径
-sys.path.insert(0, os.path.dirname(__file__))
+# 添加项目路径（已在 sys.path 中时不重复添加）
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+# 分类/产品链接的匹配模式：多个路径前缀合并为一个交替分支，一次扫描完成匹配
+_CATEGORY_RE = re.compile(r'href="(/(?:category|categories|cat)/[^"]+)"')
+_PRODUCT_RE = re.compile(r'href="(/(?:product|products|item)/[^"]+)"')
+
+# 产品详情字段按页面顺序合并为一个命名分组正则，一次扫描提取全部字段
+_EXTRACT_RE = re.compile(
+    r'<h1 class="product-title">(?P<title>[^<]+)</h1>'
+    r'.*?<div class="product-brand">(?P<brand>[^<]+)</div>'
+    r'.*?<span class="current-price">(?P<price>[^<]+)</span>'
+    r'.*?<span class="original-price">(?P<orig>[^<]+)</span>'
+    r'.*?<div class="stock-status">(?P<stock>[^<]+)</div>'
+    r'.*?<div class="average-rating">(?P<rating>[^<]+)</div>',
+    re.DOTALL
+)
+
+# 有效价格格式：可选货币符号在前或在后的数字（同时保证包含数字）
+_PRICE_RE = re.compile(r'^(?:[¥$€£]?\d+\.?\d*|\d+\.?\d*[¥$€£]?)$')
+
+# 验证函数是短字符串的纯函数，同一价格/URL 反复出现时直接命中缓存
+@lru_cache(maxsize=4096)
+def _is_valid_price(price_text):
+    """验证价格格式"""
+    return bool(price_text) and bool(_PRICE_RE.match(price_text.strip()))
+
+@lru_cache(maxsize=4096)
+def _is_valid_url(url, allowed_domains=('vivbliss.com',)):
+    """验证URL格式（allowed_domains 为元组以便作为缓存键）"""
+    if not url:
+        return False
+    
+    if url.startswith('/'):
+        return True  # 相对URL认为有效
+    
+    if url.startswith('http'):
+        return any(domain in url for domain in allowed_domains)
+    
+    return False
+
+def _emit(lines):
+    """一次写出一个测试的全部输出"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 def test_spider_import():
     """测试爬虫模块导入"""
-    print("🧪 测试爬虫模块导入...")
+    out = []
+    out.append("🧪 测试爬虫模块导入...")
     
     try:
         # 尝试导入爬虫类
         from vivbliss_scraper.spiders.vivbliss import VivblissSpider
-        print("✅ 成功导入 VivblissSpider")
+        out.append("✅ 成功导入 VivblissSpider")
         
         # 尝试导入数据项
         from vivbliss_scraper.items import VivblissItem, CategoryItem, ProductItem
-        print("✅ 成功导入数据项类")
+        out.append("✅ 成功导入数据项类")
         
+        _emit(out)
         return True
     except ImportError as e:
-        print(f"❌ 导入失败: {e}")
+        out.append(f"❌ 导入失败: {e}")
+        _emit(out)
         return False
 
 def test_spider_initialization():
     """测试爬虫初始化"""
-    print("\n🧪 测试爬虫初始化...")
+    out = []
+    out.append("\n🧪 测试爬虫初始化...")
     
     try:
         from vivbliss_scraper.spiders.vivbliss import VivblissSpider
@@ -45,19 +96,22 @@ def test_spider_initialization():
         assert 'vivbliss.com' in spider.allowed_domains, "允许的域名应该包含 'vivbliss.com'"
         assert len(spider.start_urls) > 0, "起始URL列表不应该为空"
         
-        print("✅ 爬虫初始化成功")
-        print(f"   - 名称: {spider.name}")
-        print(f"   - 允许域名: {spider.allowed_domains}")
-        print(f"   - 起始URL: {spider.start_urls}")
+        out.append("✅ 爬虫初始化成功")
+        out.append(f"   - 名称: {spider.name}")
+        out.append(f"   - 允许域名: {spider.allowed_domains}")
+        out.append(f"   - 起始URL: {spider.start_urls}")
         
+        _emit(out)
         return True
     except Exception as e:
-        print(f"❌ 爬虫初始化失败: {e}")
+        out.append(f"❌ 爬虫初始化失败: {e}")
+        _emit(out)
         return False
 
 def test_data_models():
     """测试数据模型创建"""
-    print("\n🧪 测试数据模型创建...")
+    out = []
+    out.append("\n🧪 测试数据模型创建...")
     
     try:
         from vivbliss_scraper.items import VivblissItem, CategoryItem, ProductItem
@@ -69,7 +123,7 @@ def test_data_models():
         article_item['content'] = '测试文章内容'
         article_item['date'] = '2024-01-01'
         article_item['category'] = '测试分类'
-        print("✅ VivblissItem 创建成功")
+        out.append("✅ VivblissItem 创建成功")
         
         # 测试分类项
         category_item = CategoryItem()
@@ -79,7 +133,7 @@ def test_data_models():
         category_item['path'] = '测试分类'
         category_item['product_count'] = 50
         category_item['created_at'] = datetime.now().isoformat()
-        print("✅ CategoryItem 创建成功")
+        out.append("✅ CategoryItem 创建成功")
         
         # 测试产品项
         product_item = ProductItem()
@@ -89,16 +143,19 @@ def test_data_models():
         product_item['stock_status'] = 'in_stock'
         product_item['description'] = '测试产品描述'
         product_item['created_at'] = datetime.now().isoformat()
-        print("✅ ProductItem 创建成功")
+        out.append("✅ ProductItem 创建成功")
         
+        _emit(out)
         return True
     except Exception as e:
-        print(f"❌ 数据模型创建失败: {e}")
+        out.append(f"❌ 数据模型创建失败: {e}")
+        _emit(out)
         return False
 
 def test_category_discovery_logic():
     """测试分类发现逻辑"""
-    print("\n🧪 测试分类发现逻辑...")
+    out = []
+    out.append("\n🧪 测试分类发现逻辑...")
     
     # 模拟HTML内容中的分类链接
     mock_html_content = """
@@ -112,37 +169,26 @@ def test_category_discovery_logic():
     """
     
     # 模拟分类链接发现
-    category_patterns = [
-        r'href="(/category/[^"]+)"',
-        r'href="(/categories/[^"]+)"',
-        r'href="(/cat/[^"]+)"'
-    ]
-    
-    discovered_categories = set()
+    discovered_categories = set(_CATEGORY_RE.findall(mock_html_content))
     
-    for pattern in category_patterns:
-        matches = re.findall(pattern, mock_html_content)
-        for match in matches:
-            discovered_categories.add(match)
-    
-    print(f"发现的分类链接: {list(discovered_categories)}")
+    out.append(f"发现的分类链接: {list(discovered_categories)}")
     
     # 验证发现的分类
-    expected_categories = ['/category/clothing', '/category/accessories', '/category/shoes']
+    expected_categories = frozenset(('/category/clothing', '/category/accessories', '/category/shoes'))
     
-    success = True
-    for expected in expected_categories:
-        if expected in discovered_categories:
-            print(f"✅ 成功发现分类: {expected}")
-        else:
-            print(f"❌ 未发现预期分类: {expected}")
-            success = False
+    missing = expected_categories - discovered_categories
+    for expected in sorted(expected_categories & discovered_categories):
+        out.append(f"✅ 成功发现分类: {expected}")
+    for expected in sorted(missing):
+        out.append(f"❌ 未发现预期分类: {expected}")
     
-    return success
+    _emit(out)
+    return not missing
 
 def test_product_discovery_logic():
     """测试产品发现逻辑"""
-    print("\n🧪 测试产品发现逻辑...")
+    out = []
+    out.append("\n🧪 测试产品发现逻辑...")
     
     # 模拟产品列表页面内容
     mock_product_html = """
@@ -162,37 +208,26 @@ def test_product_discovery_logic():
     """
     
     # 模拟产品链接发现
-    product_patterns = [
-        r'href="(/product/[^"]+)"',
-        r'href="(/products/[^"]+)"',
-        r'href="(/item/[^"]+)"'
-    ]
+    discovered_products = set(_PRODUCT_RE.findall(mock_product_html))
     
-    discovered_products = set()
-    
-    for pattern in product_patterns:
-        matches = re.findall(pattern, mock_product_html)
-        for match in matches:
-            discovered_products.add(match)
-    
-    print(f"发现的产品链接: {list(discovered_products)}")
+    out.append(f"发现的产品链接: {list(discovered_products)}")
     
     # 验证发现的产品
-    expected_products = ['/product/shirt-001', '/product/pants-002', '/products/watch-003']
+    expected_products = frozenset(('/product/shirt-001', '/product/pants-002', '/products/watch-003'))
     
-    success = True
-    for expected in expected_products:
-        if expected in discovered_products:
-            print(f"✅ 成功发现产品: {expected}")
-        else:
-            print(f"❌ 未发现预期产品: {expected}")
-            success = False
+    missing = expected_products - discovered_products
+    for expected in sorted(expected_products & discovered_products):
+        out.append(f"✅ 成功发现产品: {expected}")
+    for expected in sorted(missing):
+        out.append(f"❌ 未发现预期产品: {expected}")
     
-    return success
+    _emit(out)
+    return not missing
 
 def test_data_extraction_logic():
     """测试数据提取逻辑"""
-    print("\n🧪 测试数据提取逻辑...")
+    out = []
+    out.append("\n🧪 测试数据提取逻辑...")
     
     # 模拟产品详情页面内容
     mock_product_detail = """
@@ -217,35 +252,39 @@ def test_data_extraction_logic():
     </div>
     """
     
-    # 测试数据提取
+    # 测试数据提取（字段名, 分组名, 期望值）
     extraction_tests = [
-        ('产品标题', r'<h1 class="product-title">([^<]+)</h1>', 'VivBliss 精品衬衫'),
-        ('品牌', r'<div class="product-brand">([^<]+)</div>', 'VivBliss'),
-        ('当前价格', r'<span class="current-price">([^<]+)</span>', '¥299.00'),
-        ('原价', r'<span class="original-price">([^<]+)</span>', '¥399.00'),
-        ('库存状态', r'<div class="stock-status">([^<]+)</div>', '现货供应'),
-        ('评分', r'<div class="average-rating">([^<]+)</div>', '4.8'),
+        ('产品标题', 'title', 'VivBliss 精品衬衫'),
+        ('品牌', 'brand', 'VivBliss'),
+        ('当前价格', 'price', '¥299.00'),
+        ('原价', 'orig', '¥399.00'),
+        ('库存状态', 'stock', '现货供应'),
+        ('评分', 'rating', '4.8'),
     ]
     
+    match = _EXTRACT_RE.search(mock_product_detail)
+    fields = match.groupdict() if match else {}
+    
     success = True
-    for field_name, pattern, expected in extraction_tests:
-        match = re.search(pattern, mock_product_detail)
-        if match:
-            actual = match.group(1)
+    for field_name, group, expected in extraction_tests:
+        actual = fields.get(group)
+        if actual is not None:
             if actual == expected:
-                print(f"✅ 成功提取{field_name}: {actual}")
+                out.append(f"✅ 成功提取{field_name}: {actual}")
             else:
-                print(f"❌ {field_name}提取错误，期望：{expected}，实际：{actual}")
+                out.append(f"❌ {field_name}提取错误，期望：{expected}，实际：{actual}")
                 success = False
         else:
-            print(f"❌ 未能提取{field_name}")
+            out.append(f"❌ 未能提取{field_name}")
             success = False
     
+    _emit(out)
     return success
 
 def test_url_building_logic():
     """测试URL构建逻辑"""
-    print("\n🧪 测试URL构建逻辑...")
+    out = []
+    out.append("\n🧪 测试URL构建逻辑...")
     
     base_url = "https://vivbliss.com"
     relative_urls = [
@@ -255,35 +294,28 @@ def test_url_building_logic():
         "https://vivbliss.com/absolute/url"  # 绝对URL
     ]
     
-    def urljoin_simple(base, relative):
-        """简单的URL连接函数"""
-        if relative.startswith('http'):
-            return relative
-        elif relative.startswith('/'):
-            return base + relative
-        else:
-            return base + '/' + relative
-    
     success = True
     for relative in relative_urls:
-        full_url = urljoin_simple(base_url, relative)
-        print(f"URL构建: '{relative}' -> '{full_url}'")
+        full_url = urljoin(base_url + '/', relative)
+        out.append(f"URL构建: '{relative}' -> '{full_url}'")
         
         # 验证构建的URL
         if not full_url.startswith('http'):
-            print(f"❌ URL格式错误: {full_url}")
+            out.append(f"❌ URL格式错误: {full_url}")
             success = False
         elif 'vivbliss.com' not in full_url:
-            print(f"❌ URL域名错误: {full_url}")
+            out.append(f"❌ URL域名错误: {full_url}")
             success = False
         else:
-            print(f"✅ URL构建正确")
+            out.append(f"✅ URL构建正确")
     
+    _emit(out)
     return success
 
 def test_data_validation():
     """测试数据验证逻辑"""
-    print("\n🧪 测试数据验证逻辑...")
+    out = []
+    out.append("\n🧪 测试数据验证逻辑...")
     
     # 测试价格验证
     price_test_cases = [
@@ -296,30 +328,13 @@ def test_data_validation():
         ("价格面议", False)
     ]
     
-    def is_valid_price(price_text):
-        """验证价格格式"""
-        if not price_text:
-            return False
-        
-        # 检查是否包含数字
-        if not re.search(r'\d+', price_text):
-            return False
-        
-        # 检查是否是有效的价格格式
-        price_patterns = [
-            r'^[¥$€£]?\d+\.?\d*$',  # 简单价格格式
-            r'^\d+\.?\d*[¥$€£]?$',  # 数字+货币符号
-        ]
-        
-        return any(re.match(pattern, price_text.strip()) for pattern in price_patterns)
-    
     success = True
     for price, expected in price_test_cases:
-        result = is_valid_price(price)
+        result = _is_valid_price(price)
         if result == expected:
-            print(f"✅ 价格验证正确: '{price}' -> {result}")
+            out.append(f"✅ 价格验证正确: '{price}' -> {result}")
         else:
-            print(f"❌ 价格验证错误: '{price}' -> 期望 {expected}, 实际 {result}")
+            out.append(f"❌ 价格验证错误: '{price}' -> 期望 {expected}, 实际 {result}")
             success = False
     
     # 测试URL验证
@@ -331,30 +346,15 @@ def test_data_validation():
         ("https://other-site.com/product", False)  # 不在允许域名内
     ]
     
-    def is_valid_url(url, allowed_domains=['vivbliss.com']):
-        """验证URL格式"""
-        if not url:
-            return False
-        
-        if url.startswith('/'):
-            return True  # 相对URL认为有效
-        
-        if url.startswith('http'):
-            for domain in allowed_domains:
-                if domain in url:
-                    return True
-            return False
-        
-        return False
-    
     for url, expected in url_test_cases:
-        result = is_valid_url(url)
+        result = _is_valid_url(url)
         if result == expected:
-            print(f"✅ URL验证正确: '{url}' -> {result}")
+            out.append(f"✅ URL验证正确: '{url}' -> {result}")
         else:
-            print(f"❌ URL验证错误: '{url}' -> 期望 {expected}, 实际 {result}")
+            out.append(f"❌ URL验证错误: '{url}' -> 期望 {expected}, 实际 {result}")
             success = False
     
+    _emit(out)
     return success
 
 def main():
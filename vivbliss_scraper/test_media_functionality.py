@@ -5,22 +5,15 @@
 
 import sys
 import os
-sys.path.insert(0, '.')
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
 
-from scrapy.http import HtmlResponse
-from vivbliss_scraper.spiders.vivbliss import VivblissSpider
-from vivbliss_scraper.items import VivblissItem
+# scrapy 与爬虫模块（连带 Twisted、lxml 等）在测试函数内按需导入，
+# 避免仅收集或筛选部分测试时也承担完整的导入开销
 
-
-def test_media_extraction():
-    """测试媒体提取功能"""
-    print("🚀 开始测试媒体提取功能...")
-    
-    # 创建爬虫实例
-    spider = VivblissSpider()
-    
-    # 创建包含媒体内容的测试HTML
-    test_html = """
+# 包含媒体内容的测试HTML（模块加载时编码一次）
+_MEDIA_TEST_HTML = ("""
     <html>
         <head><title>测试页面</title></head>
         <body>
@@ -38,12 +31,23 @@ def test_media_extraction():
             </article>
         </body>
     </html>
-    """
+    """).encode('utf-8')
+
+
+def test_media_extraction():
+    """测试媒体提取功能"""
+    print("🚀 开始测试媒体提取功能...")
+    
+    from scrapy.http import HtmlResponse
+    from vivbliss_scraper.spiders.vivbliss import VivblissSpider
+    
+    # 创建爬虫实例
+    spider = VivblissSpider()
     
     # 创建模拟响应
     response = HtmlResponse(
         url="https://vivbliss.com/test",
-        body=test_html.encode('utf-8'),
+        body=_MEDIA_TEST_HTML,
         encoding='utf-8'
     )
     
@@ -116,6 +120,8 @@ def test_media_validation():
     """测试媒体验证功能"""
     print("\n🔍 测试媒体验证功能...")
     
+    from vivbliss_scraper.spiders.vivbliss import VivblissSpider
+    
     spider = VivblissSpider()
     
     # 测试图片URL验证
@@ -127,10 +133,10 @@ def test_media_validation():
         ""                                    # 无效
     ]
     
-    valid_images = 0
+    valid_image_urls = set(spider.media_validator.filter_valid_images(test_image_urls))
+    valid_images = len(valid_image_urls)
     for url in test_image_urls:
-        if spider.media_validator.is_valid_image_url(url):
-            valid_images += 1
+        if url in valid_image_urls:
             print(f"✅ 有效图片URL: {url}")
         else:
             print(f"❌ 无效图片URL: {url}")
@@ -144,10 +150,10 @@ def test_media_validation():
         ""                                    # 无效
     ]
     
-    valid_videos = 0
+    valid_video_urls = set(spider.media_validator.filter_valid_videos(test_video_urls))
+    valid_videos = len(valid_video_urls)
     for url in test_video_urls:
-        if spider.media_validator.is_valid_video_url(url):
-            valid_videos += 1
+        if url in valid_video_urls:
             print(f"✅ 有效视频URL: {url}")
         else:
             print(f"❌ 无效视频URL: {url}")
@@ -5,11 +5,51 @@ TDD GREEN阶段测试 - 验证discover_products_with_priority方法实现
 
 import sys
 import os
+import re
 import ast
 import inspect
 
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+# 添加项目路径（已在 sys.path 中时不重复添加）
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+from ast_cache import load_ast_text
+
+SPIDER_PATH = os.path.join(_THIS_DIR, 'vivbliss_scraper', 'spiders', 'vivbliss.py')
+
+# discover_products_with_priority 方法应包含的关键功能片段
+KEY_FEATURES = (
+    ('链接发现', 'link_discovery.discover_product_links'),
+    ('日志记录', 'LoggingHelper.log_discovery_results'),
+    ('统计更新', 'stats_manager.increment'),
+    ('请求构建', 'RequestBuilder.build_product_request'),
+    ('调度器集成', 'priority_scheduler.add_product_request'),
+    ('错误处理', 'parse_product_with_error_handling'),
+)
+
+# 所有片段合并为一个交替正则，一次扫描方法体即可找出全部出现的片段
+_KEY_FEATURE_RE = re.compile('|'.join(re.escape(needle) for _, needle in KEY_FEATURES))
+
+# 爬虫源码中应包含的集成点片段
+INTEGRATION_CHECKS = (
+    ('调用点存在', "self.discover_products_with_priority(response, category_item['path'])"),
+    ('优先级调度器导入', 'from vivbliss_scraper.utils.priority_scheduler import DirectoryPriorityScheduler'),
+    ('调度器初始化', 'self.priority_scheduler = DirectoryPriorityScheduler()'),
+    ('错误处理方法', 'parse_product_with_error_handling'),
+)
+
+# 同样合并为一个交替正则，整个源码只扫描一遍
+_INTEGRATION_RE = re.compile('|'.join(re.escape(needle) for _, needle in INTEGRATION_CHECKS))
+
+def _find_method(tree):
+    """在模块顶层类的方法中查找discover_products_with_priority（不深入函数体）"""
+    for node in ast.iter_child_nodes(tree):
+        if isinstance(node, ast.ClassDef):
+            for member in node.body:
+                if isinstance(member, ast.FunctionDef) and member.name == 'discover_products_with_priority':
+                    return member
+    return None
 
 def test_method_syntax():
     """测试方法语法是否正确"""
@@ -18,28 +58,21 @@ def test_method_syntax():
     
     try:
         # 读取文件并解析AST
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 解析语法树
-        tree = ast.parse(source_code)
+        _, tree = load_ast_text(SPIDER_PATH)
         
         # 查找方法定义
-        method_found = False
+        node = _find_method(tree)
+        method_found = node is not None
         method_details = {}
         
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) and node.name == 'discover_products_with_priority':
-                method_found = True
-                method_details = {
-                    'name': node.name,
-                    'args': [arg.arg for arg in node.args.args],
-                    'decorators': [decorator.id if hasattr(decorator, 'id') else str(decorator) for decorator in node.decorator_list],
-                    'line_number': node.lineno,
-                    'has_docstring': isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant)
-                }
-                break
+        if method_found:
+            method_details = {
+                'name': node.name,
+                'args': [arg.arg for arg in node.args.args],
+                'decorators': [decorator.id if hasattr(decorator, 'id') else str(decorator) for decorator in node.decorator_list],
+                'line_number': node.lineno,
+                'has_docstring': isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant)
+            }
         
         print(f"📋 方法检查结果:")
         print(f"   ✅ 方法定义找到: {method_found}")
@@ -74,43 +107,21 @@ def test_method_content():
     print(f"\n🔍 内容分析:")
     
     try:
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content, tree = load_ast_text(SPIDER_PATH)
         
         # 提取方法内容
-        lines = content.split('\n')
-        start_line = None
-        end_line = None
-        
-        for i, line in enumerate(lines):
-            if 'def discover_products_with_priority' in line:
-                start_line = i
-            elif start_line is not None and line.strip().startswith('def ') and i > start_line:
-                end_line = i
-                break
-        
-        if start_line is None:
+        node = _find_method(tree)
+        if node is None:
             print("❌ 未找到方法定义")
             return False
         
-        if end_line is None:
-            end_line = len(lines)
+        method_content = ast.get_source_segment(content, node)
         
-        method_lines = lines[start_line:end_line]
-        method_content = '\n'.join(method_lines)
-        
-        print(f"   📏 方法行数: {len(method_lines)}")
+        print(f"   📏 方法行数: {node.end_lineno - node.lineno + 1}")
         
         # 检查关键功能
-        key_features = {
-            '链接发现': 'link_discovery.discover_product_links' in method_content,
-            '日志记录': 'LoggingHelper.log_discovery_results' in method_content,
-            '统计更新': 'stats_manager.increment' in method_content,
-            '请求构建': 'RequestBuilder.build_product_request' in method_content,
-            '调度器集成': 'priority_scheduler.add_product_request' in method_content,
-            '错误处理': 'parse_product_with_error_handling' in method_content
-        }
+        found = set(_KEY_FEATURE_RE.findall(method_content))
+        key_features = {feature: needle in found for feature, needle in KEY_FEATURES}
         
         for feature, present in key_features.items():
             print(f"   {'✅' if present else '❌'} {feature}: {present}")
@@ -129,16 +140,10 @@ def test_integration_points():
     print(f"\n🔗 集成点检查:")
     
     try:
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        integration_checks = {
-            '调用点存在': 'discover_products_with_priority(response, category_path)' in content,
-            '优先级调度器导入': 'from vivbliss_scraper.utils.priority_scheduler import DirectoryPriorityScheduler' in content,
-            '调度器初始化': 'self.priority_scheduler = DirectoryPriorityScheduler()' in content,
-            '错误处理方法': 'parse_product_with_error_handling' in content
-        }
+        content, _ = load_ast_text(SPIDER_PATH)
+        
+        found = set(_INTEGRATION_RE.findall(content))
+        integration_checks = {check: needle in found for check, needle in INTEGRATION_CHECKS}
         
         for check, passed in integration_checks.items():
             print(f"   {'✅' if passed else '❌'} {check}: {passed}")
@@ -4,39 +4,119 @@
 """
 import os
 import sys
+import asyncio
+import atexit
+import itertools
 import pymongo
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import InsertOne, DeleteOne
+from pymongo.uri_parser import parse_uri
 from dotenv import load_dotenv
 
+from vivbliss_scraper.utils.mongo_helpers import mask_uri
+
 # 加载环境变量
 load_dotenv()
 
-def test_mongo_connection():
+# 探测时最多列出的集合数量（服务器端按批次大小返回，避免大库传回全部集合名）
+MAX_LISTED_COLLECTIONS = 20
+
+# 已创建的客户端，按规范化的连接键索引，供复用和退出时统一关闭
+_clients = {}
+
+
+def _client_key(uri):
+    """
+    把 URI 规范化为缓存键
+    
+    参数顺序不同、省略默认端口等写法等价的 URI 得到同一个键，复用同一个客户端；
+    SRV URI 解析需要 DNS 查询，直接以原始字符串为键。
+    """
+    if uri.startswith('mongodb+srv'):
+        return uri
+    parsed = parse_uri(uri)
+    options = tuple(sorted((name.lower(), str(value)) for name, value in parsed['options'].items()))
+    return (
+        tuple(sorted(parsed['nodelist'])),
+        parsed['database'],
+        parsed['username'],
+        parsed['password'],
+        options
+    )
+
+
+def _get_client(uri):
+    """按连接键复用 MongoClient，重复探测时不再重新握手和认证"""
+    key = _client_key(uri)
+    client = _clients.get(key)
+    if client is None:
+        # 探测只需少量连接：保持一个热连接，限制并发建连，避免并行测试时冲击服务器
+        client = _clients[key] = pymongo.MongoClient(
+            uri,
+            serverSelectionTimeoutMS=5000,
+            connectTimeoutMS=5000,
+            minPoolSize=1,
+            maxPoolSize=5,
+            maxIdleTimeMS=60000,
+            maxConnecting=2,
+            appname="vivbliss-auth-probe"
+        )
+    return client
+
+
+def reset_client_cache():
+    """关闭并清空缓存的客户端（进程退出时自动调用，测试需要隔离时也可手动调用）"""
+    while _clients:
+        _clients.popitem()[1].close()
+
+
+atexit.register(reset_client_cache)
+
+def _mongo_env():
+    """一次性读取连接所需的环境变量快照"""
+    env = os.environ
+    return {
+        'host': env.get('MONGO_HOST', 'localhost'),
+        'port': env.get('MONGO_PORT', '27017'),
+        'username': env.get('MONGO_USERNAME'),
+        'password': env.get('MONGO_PASSWORD'),
+        'database': env.get('MONGO_DATABASE', 'vivbliss_db'),
+        'uri': env.get('MONGO_URI'),
+    }
+
+
+def _build_uri(env):
+    """根据环境变量快照构建 MongoDB URI（MONGO_URI 优先）"""
+    if env['uri']:
+        return env['uri']
+    if env['username'] and env['password']:
+        return (f"mongodb://{env['username']}:{env['password']}@{env['host']}:{int(env['port'])}"
+                f"/{env['database']}?authSource=admin")
+    return f"mongodb://{env['host']}:{int(env['port'])}"
+
+
+def test_mongo_connection(env=None):
     """测试 MongoDB 连接（支持认证）"""
-    # 获取环境变量
-    mongo_host = os.getenv('MONGO_HOST', 'localhost')
-    mongo_port = int(os.getenv('MONGO_PORT', '27017'))
-    mongo_username = os.getenv('MONGO_USERNAME')
-    mongo_password = os.getenv('MONGO_PASSWORD')
-    mongo_database = os.getenv('MONGO_DATABASE', 'vivbliss_db')
+    # 获取环境变量（调用方已读取时直接复用）
+    if env is None:
+        env = _mongo_env()
+    mongo_host = env['host']
+    mongo_port = int(env['port'])
+    mongo_username = env['username']
+    mongo_database = env['database']
     
-    # 构建 MongoDB URI
-    if mongo_username and mongo_password:
-        mongo_uri = f'mongodb://{mongo_username}:{mongo_password}@{mongo_host}:{mongo_port}/{mongo_database}?authSource=admin'
+    if mongo_username and env['password']:
         print(f"使用认证连接: {mongo_host}:{mongo_port} (用户: {mongo_username})")
     else:
-        mongo_uri = f'mongodb://{mongo_host}:{mongo_port}'
         print(f"使用无认证连接: {mongo_host}:{mongo_port}")
     
-    # 允许环境变量覆盖
-    mongo_uri = os.getenv('MONGO_URI', mongo_uri)
+    # 构建 MongoDB URI（允许环境变量覆盖）
+    mongo_uri = _build_uri(env)
     
     try:
-        # 创建客户端
-        client = pymongo.MongoClient(
-            mongo_uri,
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=5000
-        )
+        # 获取（复用）客户端
+        client = _get_client(mongo_uri)
         
         # 测试连接
         client.admin.command('ping')
@@ -46,29 +126,32 @@ def test_mongo_connection():
         db = client[mongo_database]
         print(f"✅ 成功连接到数据库: {mongo_database}")
         
-        # 列出集合
-        collections = db.list_collection_names()
+        # 列出集合（只取名称，首批最多 MAX_LISTED_COLLECTIONS 个，取完即关闭游标）
+        with db.list_collections(
+            filter={'name': {'$not': {'$regex': r'^system\.'}}},
+            nameOnly=True,
+            cursor={'batchSize': MAX_LISTED_COLLECTIONS}
+        ) as cursor:
+            collections = [c['name'] for c in itertools.islice(cursor, MAX_LISTED_COLLECTIONS)]
         if collections:
-            print(f"📋 现有集合: {', '.join(collections)}")
+            print(f"📋 现有集合（最多显示 {MAX_LISTED_COLLECTIONS} 个）: {', '.join(collections)}")
         else:
             print("📋 数据库中暂无集合")
         
-        # 测试写入
+        # 测试写入并清理：预先生成 _id，插入与删除合并为一次有序 bulk_write，只需一次往返
         test_collection = db['test_auth']
-        test_doc = {'test': 'auth_check', 'timestamp': pymongo.datetime.datetime.now()}
-        result = test_collection.insert_one(test_doc)
-        print(f"✅ 测试文档写入成功，ID: {result.inserted_id}")
-        
-        # 测试读取
-        found_doc = test_collection.find_one({'_id': result.inserted_id})
-        print(f"✅ 测试文档读取成功: {found_doc}")
-        
-        # 清理测试数据
-        test_collection.delete_one({'_id': result.inserted_id})
+        test_id = ObjectId()
+        test_doc = {'_id': test_id, 'test': 'auth_check', 'timestamp': datetime.now(timezone.utc)}
+        result = test_collection.bulk_write(
+            [InsertOne(test_doc), DeleteOne({'_id': test_id})],
+            ordered=True
+        )
+        if result.inserted_count != 1 or result.deleted_count != 1:
+            print(f"❌ 测试文档读写异常: 写入 {result.inserted_count}, 删除 {result.deleted_count}")
+            return False
+        print(f"✅ 测试文档写入成功，ID: {test_id}")
         print("✅ 测试数据已清理")
         
-        # 关闭连接
-        client.close()
         print("\n🎉 所有测试通过！MongoDB 认证配置正确。")
         return True
         
@@ -91,19 +174,76 @@ def test_mongo_connection():
         print(f"❌ 未知错误: {e}")
         return False
 
+async def _probe_async(uri, database):
+    """异步探测单个部署：ping 与写入/清理探测并发发出"""
+    client = pymongo.AsyncMongoClient(
+        uri,
+        serverSelectionTimeoutMS=5000,
+        connectTimeoutMS=5000,
+        appname="vivbliss-auth-probe"
+    )
+    try:
+        test_id = ObjectId()
+        test_doc = {'_id': test_id, 'test': 'auth_check', 'timestamp': datetime.now(timezone.utc)}
+        _, result = await asyncio.gather(
+            client.admin.command('ping'),
+            client[database]['test_auth'].bulk_write(
+                [InsertOne(test_doc), DeleteOne({'_id': test_id})],
+                ordered=True
+            )
+        )
+        return result.inserted_count == 1 and result.deleted_count == 1
+    finally:
+        await client.close()
+
+
+async def probe_mongo_connections_async(uris=None, database=None):
+    """
+    并发探测多个 MongoDB 部署，返回 {uri: 是否通过}
+    
+    使用 PyMongo 原生 asyncio 驱动（AsyncMongoClient，需要 PyMongo 4.9+），
+    各部署的网络往返相互重叠，总耗时约等于最慢的一个部署。
+    未指定 uris 时探测环境变量配置的部署。
+    """
+    if not hasattr(pymongo, 'AsyncMongoClient'):
+        raise RuntimeError("异步探测需要 PyMongo 4.9+（AsyncMongoClient）")
+    
+    env = _mongo_env()
+    uris = list(uris or [_build_uri(env)])
+    database = database or env['database']
+    
+    results = await asyncio.gather(
+        *(_probe_async(uri, database) for uri in uris),
+        return_exceptions=True
+    )
+    for uri, result in zip(uris, results):
+        if isinstance(result, BaseException):
+            print(f"❌ {mask_uri(uri)}: {result}")
+    return {uri: result is True for uri, result in zip(uris, results)}
+
+
 if __name__ == "__main__":
     print("=== MongoDB 认证连接测试 ===\n")
     
     # 显示当前配置
-    print("当前环境变量配置:")
-    print(f"MONGO_HOST: {os.getenv('MONGO_HOST', 'localhost')}")
-    print(f"MONGO_PORT: {os.getenv('MONGO_PORT', '27017')}")
-    print(f"MONGO_USERNAME: {os.getenv('MONGO_USERNAME', '(未设置)')}")
-    print(f"MONGO_PASSWORD: {'***' if os.getenv('MONGO_PASSWORD') else '(未设置)'}")
-    print(f"MONGO_DATABASE: {os.getenv('MONGO_DATABASE', 'vivbliss_db')}")
-    print(f"MONGO_URI: {os.getenv('MONGO_URI', '(未设置)')}")
-    print()
+    env = _mongo_env()
+    print(
+        "当前环境变量配置:\n"
+        f"MONGO_HOST: {env['host']}\n"
+        f"MONGO_PORT: {env['port']}\n"
+        f"MONGO_USERNAME: {env['username'] or '(未设置)'}\n"
+        f"MONGO_PASSWORD: {'***' if env['password'] else '(未设置)'}\n"
+        f"MONGO_DATABASE: {env['database']}\n"
+        f"MONGO_URI: {env['uri'] or '(未设置)'}\n"
+    )
     
-    # 运行测试
-    success = test_mongo_connection()
+    # 运行测试；--async [URI ...] 使用异步驱动并发探测一个或多个部署
+    if '--async' in sys.argv[1:]:
+        uris = [arg for arg in sys.argv[1:] if arg != '--async']
+        results = asyncio.run(probe_mongo_connections_async(uris or None, env['database']))
+        for uri, passed in results.items():
+            print(f"{'✅' if passed else '❌'} {mask_uri(uri)}")
+        success = all(results.values())
+    else:
+        success = test_mongo_connection(env)
     sys.exit(0 if success else 1)
\ No newline at end of file
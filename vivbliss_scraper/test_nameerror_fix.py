@@ -7,39 +7,44 @@ RED阶段：编写失败测试确认错误存在
 import unittest
 import sys
 import os
-import ast
 
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+# 添加项目路径（已在 sys.path 中时不重复添加）
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+from ast_cache import load_ast
+from nameerror_helpers import category_path_lines, ParseCategoryCollector
+
+SPIDER_PATH = os.path.join(_THIS_DIR, 'vivbliss_scraper', 'spiders', 'vivbliss.py')
+
+# 错误写法与正确写法的源码片段
+_WRONG_USAGE = "discover_products_with_priority(response, category_path)"
+_PATH_ASSIGNMENT = "category_item['path'] ="
 
 class TestNameErrorTDD(unittest.TestCase):
     """测试NameError的TDD测试用例"""
     
+    @classmethod
+    def setUpClass(cls):
+        """读取并解析一次爬虫源码，所有测试共享"""
+        cls.source, cls.tree = load_ast(SPIDER_PATH)
+        cls.source_text = cls.source.decode('utf-8')
+        cls.category_path_lines = category_path_lines(cls.source_text)
+        collector = ParseCategoryCollector()
+        collector.visit(cls.tree)
+        cls.parse_category_info = collector
+        cls.has_wrong_usage = _WRONG_USAGE in cls.source_text
+        cls.has_path_assignment = _PATH_ASSIGNMENT in cls.source_text
+    
     def test_category_path_variable_usage(self):
         """RED阶段：测试category_path变量使用情况"""
-        # 读取源代码
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 查找parse_category方法
-        lines = source_code.split('\n')
-        parse_category_start = None
-        parse_category_end = None
-        
-        for i, line in enumerate(lines):
-            if 'def parse_category' in line:
-                parse_category_start = i
-            elif parse_category_start is not None and line.strip().startswith('def ') and i > parse_category_start:
-                parse_category_end = i
-                break
-        
-        if parse_category_end is None:
-            parse_category_end = len(lines)
-        
-        # 提取parse_category方法内容
-        method_lines = lines[parse_category_start:parse_category_end]
-        method_content = '\n'.join(method_lines)
+        # 查找parse_category方法，只检查落在方法行范围内的category_path行
+        parse_category_node = self.parse_category_info.node
+        method_lines = [
+            line for line_no, line in self.category_path_lines
+            if parse_category_node.lineno <= line_no <= parse_category_node.end_lineno
+        ]
         
         # 检查category_path的定义和使用
         category_path_defined = False
@@ -47,7 +52,7 @@ class TestNameErrorTDD(unittest.TestCase):
         
         for line in method_lines:
             # 检查定义（赋值）
-            if 'category_path =' in line and not line.strip().startswith('#'):
+            if 'category_path =' in line:
                 category_path_defined = True
             # 检查使用
             if 'category_path)' in line and 'discover_products_with_priority' in line:
@@ -64,32 +69,12 @@ class TestNameErrorTDD(unittest.TestCase):
     
     def test_available_variables_in_parse_category(self):
         """RED阶段：测试parse_category中可用的变量"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 使用AST解析
-        tree = ast.parse(source_code)
+        # 遍历结果在 setUpClass 中已收集
+        info = self.parse_category_info
+        self.assertIsNotNone(info.node, "应该找到parse_category方法")
         
-        # 找到parse_category方法
-        parse_category_node = None
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) and node.name == 'parse_category':
-                parse_category_node = node
-                break
-        
-        self.assertIsNotNone(parse_category_node, "应该找到parse_category方法")
-        
-        # 收集方法中的所有赋值
-        assigned_vars = set()
-        for node in ast.walk(parse_category_node):
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        assigned_vars.add(target.id)
-                    elif isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name):
-                        # 处理 category_item['path'] 这样的赋值
-                        assigned_vars.add(target.value.id)
+        # 方法中的所有赋值（包括 category_item['path'] 这样的下标赋值）
+        assigned_vars = info.assigned | {name for name, _ in info.subscript_assigned}
         
         print(f"\n🔍 parse_category中定义的变量：")
         for var in sorted(assigned_vars):
@@ -103,15 +88,11 @@ class TestNameErrorTDD(unittest.TestCase):
     
     def test_correct_variable_should_be_used(self):
         """RED阶段：测试应该使用的正确变量"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
         # 检查category_item['path']是否存在
-        category_item_path_assigned = "category_item['path'] =" in source_code
+        category_item_path_assigned = self.has_path_assignment
         
         # 检查错误的使用
-        wrong_usage = "discover_products_with_priority(response, category_path)" in source_code
+        wrong_usage = self.has_wrong_usage
         
         print(f"\n📊 变量使用分析：")
         print(f"   category_item['path'] 已赋值: {'✅' if category_item_path_assigned else '❌'}")
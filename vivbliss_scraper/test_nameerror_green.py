@@ -6,38 +6,43 @@ TDD GREEN阶段测试 - 验证NameError修复
 import unittest
 import sys
 import os
+import re
 import ast
 
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+# 添加项目路径（已在 sys.path 中时不重复添加）
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+from ast_cache import load_ast
+from nameerror_helpers import category_path_lines, ParseCategoryCollector
+
+SPIDER_PATH = os.path.join(_THIS_DIR, 'vivbliss_scraper', 'spiders', 'vivbliss.py')
+
+# category_path 的合法出现形式：字符串（含 response.meta.get('category_path'）、
+# 函数参数定义、关键字参数传递，以及与 category_item 同行的使用
+_ALLOWED_CATEGORY_PATH_RE = re.compile(r"""["']category_path["']|def |category_path=|category_item""")
 
 class TestNameErrorFixTDD(unittest.TestCase):
     """测试NameError修复的TDD测试用例"""
     
+    @classmethod
+    def setUpClass(cls):
+        """读取并解析一次爬虫源码，所有测试共享"""
+        cls.source, cls.tree = load_ast(SPIDER_PATH)
+        cls.source_text = cls.source.decode('utf-8')
+        cls.category_path_lines = category_path_lines(cls.source_text)
+        collector = ParseCategoryCollector()
+        collector.visit(cls.tree)
+        cls.parse_category_info = collector
+        # parse_category 的源码片段（由语法树节点给出，无需逐行查找，也不必拆分整个文件）
+        node = collector.node
+        cls.parse_category_source = ast.get_source_segment(cls.source_text, node) if node else ''
+    
     def test_category_path_fixed(self):
         """GREEN阶段：测试category_path错误已修复"""
-        # 读取源代码
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 查找parse_category方法
-        lines = source_code.split('\n')
-        parse_category_start = None
-        parse_category_end = None
-        
-        for i, line in enumerate(lines):
-            if 'def parse_category' in line:
-                parse_category_start = i
-            elif parse_category_start is not None and line.strip().startswith('def ') and i > parse_category_start:
-                parse_category_end = i
-                break
-        
-        if parse_category_end is None:
-            parse_category_end = len(lines)
-        
         # 提取parse_category方法内容
-        method_lines = lines[parse_category_start:parse_category_end]
+        method_lines = self.parse_category_source.splitlines()
         
         # 检查修复
         category_path_used = False
@@ -67,15 +72,9 @@ class TestNameErrorFixTDD(unittest.TestCase):
     
     def test_syntax_correctness(self):
         """GREEN阶段：测试语法正确性"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        
         try:
-            # 尝试编译文件以检查语法
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source_code = f.read()
-            
             # 编译代码（不执行）
-            compile(source_code, file_path, 'exec')
+            compile(self.source, SPIDER_PATH, 'exec')
             syntax_valid = True
             error_msg = None
         except SyntaxError as e:
@@ -95,50 +94,14 @@ class TestNameErrorFixTDD(unittest.TestCase):
     
     def test_variable_consistency(self):
         """GREEN阶段：测试变量使用一致性"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 解析AST
-        tree = ast.parse(source_code)
-        
-        # 找到parse_category方法
-        parse_category_node = None
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) and node.name == 'parse_category':
-                parse_category_node = node
-                break
-        
-        self.assertIsNotNone(parse_category_node, "应该找到parse_category方法")
+        # 遍历结果在 setUpClass 中已收集
+        info = self.parse_category_info
+        self.assertIsNotNone(info.node, "应该找到parse_category方法")
         
         # 检查category_item是否被正确定义和使用
-        category_item_defined = False
-        category_item_path_assigned = False
-        category_item_path_used = False
-        
-        for node in ast.walk(parse_category_node):
-            # 检查category_item定义
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name) and target.id == 'category_item':
-                        category_item_defined = True
-                    # 检查category_item['path']赋值
-                    elif (isinstance(target, ast.Subscript) and 
-                          isinstance(target.value, ast.Name) and 
-                          target.value.id == 'category_item' and
-                          isinstance(target.slice, ast.Constant) and
-                          target.slice.value == 'path'):
-                        category_item_path_assigned = True
-            
-            # 检查在函数调用中使用category_item['path']
-            if isinstance(node, ast.Call):
-                for arg in node.args:
-                    if (isinstance(arg, ast.Subscript) and
-                        isinstance(arg.value, ast.Name) and
-                        arg.value.id == 'category_item' and
-                        isinstance(arg.slice, ast.Constant) and
-                        arg.slice.value == 'path'):
-                        category_item_path_used = True
+        category_item_defined = 'category_item' in info.assigned
+        category_item_path_assigned = ('category_item', 'path') in info.subscript_assigned
+        category_item_path_used = ('category_item', 'path') in info.subscript_args
         
         print(f"\n🔍 变量一致性检查：")
         print(f"   category_item 已定义: {'✅' if category_item_defined else '❌'}")
@@ -151,47 +114,23 @@ class TestNameErrorFixTDD(unittest.TestCase):
     
     def test_fix_completeness(self):
         """GREEN阶段：测试修复的完整性"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 检查是否还有其他地方使用了未定义的category_path
-        # 排除注释和字符串
-        lines = source_code.split('\n')
-        other_category_path_usage = []
-        
-        for i, line in enumerate(lines, 1):
-            # 跳过注释
-            if line.strip().startswith('#'):
-                continue
-            # 跳过字符串中的category_path
-            if 'category_path' in line and not ('"category_path"' in line or "'category_path'" in line):
-                # 检查是否是函数参数定义
-                if 'def ' in line and 'category_path' in line:
-                    continue  # 这是合法的参数定义
-                # 检查是否是response.meta.get('category_path'
-                if "response.meta.get('category_path'" in line:
-                    continue  # 这是合法的meta获取
-                # 检查是否是参数传递
-                if 'category_path=' in line:
-                    continue  # 这是合法的参数传递
-                    
-                # 如果不是上述情况，可能是问题
-                if 'category_path' in line and 'category_item' not in line:
-                    other_category_path_usage.append((i, line.strip()))
+        # 检查是否还有其他地方使用了未定义的category_path（注释已在扫描时排除）
+        # 找到第一处不合法的使用即停止
+        bad_usage = next(
+            ((i, line.strip()) for i, line in self.category_path_lines
+             if not _ALLOWED_CATEGORY_PATH_RE.search(line)),
+            None
+        )
         
         print(f"\n🔎 完整性检查：")
-        if other_category_path_usage:
+        if bad_usage:
             print(f"   ⚠️  发现其他可能的category_path使用：")
-            for line_no, line in other_category_path_usage[:5]:  # 只显示前5个
-                print(f"      行 {line_no}: {line}")
+            print(f"      行 {bad_usage[0]}: {bad_usage[1]}")
         else:
             print(f"   ✅ 没有发现其他未处理的category_path使用")
         
         # 修复应该是完整的
-        self.assertEqual(len(other_category_path_usage), 0, 
-                        f"不应该有其他未处理的category_path使用，发现{len(other_category_path_usage)}处")
-
+        self.assertIsNone(bad_usage, f"不应该有其他未处理的category_path使用，发现: {bad_usage}")
 
 def run_green_phase_tests():
     """运行GREEN阶段测试"""
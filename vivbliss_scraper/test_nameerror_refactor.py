@@ -6,30 +6,105 @@ TDD REFACTOR阶段测试 - 验证NameError修复的代码质量
 import unittest
 import sys
 import os
+import re
 import ast
+from collections import deque
 
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+# 添加项目路径（已在 sys.path 中时不重复添加）
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+from ast_cache import load_ast
+
+SPIDER_PATH = os.path.join(_THIS_DIR, 'vivbliss_scraper', 'spiders', 'vivbliss.py')
+
+# 方法体中可疑的 category_path 行：跳过空行、注释行和以引号开头的行，
+# 且同一行没有 category_item['path']
+_SUSPECT_CATEGORY_PATH_RE = re.compile(
+    r"""^[ \t]*(?![#"'\s])(?!.*category_item\['path'\]).*category_path.*$""", re.M)
+
+# 检查未定义变量时排除的内置函数名
+_BUILTIN_NAMES = frozenset({'len', 'range', 'enumerate', 'str', 'int', 'float', 'list', 'dict', 'set', 'tuple'})
+
+# 检查未定义变量时排除的已知类属性和导入（均为完整标识符，按集合成员判断）
+_KNOWN_ATTRS = frozenset({'logger', 'category_extractor', 'stats_manager', 'priority_scheduler'})
+
+def _find_funcdefs(tree, names):
+    """
+    按名称查找函数定义，返回 {名称: FunctionDef}（同名取第一个）
+    
+    只进入模块和类的成员列表，不遍历函数体和表达式节点；全部找到后立即返回。
+    """
+    wanted = set(names)
+    found = {}
+    queue = deque(tree.body)
+    while queue and wanted:
+        node = queue.popleft()
+        if isinstance(node, ast.FunctionDef) and node.name in wanted:
+            found[node.name] = node
+            wanted.discard(node.name)
+        elif isinstance(node, ast.ClassDef):
+            queue.extend(node.body)
+    return found
+
+class _QualityVisitor(ast.NodeVisitor):
+    """按节点类型分派，一次遍历收集方法中的赋值、调用和变量读取"""
+    
+    def __init__(self):
+        self.assigned = set()               # 直接赋值的变量名
+        self.loaded = set()                 # 被读取的变量名
+        self.uses_category_item_path = False
+    
+    def visit_Assign(self, node):
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.assigned.add(target.id)
+        self.generic_visit(node)
+    
+    def visit_Call(self, node):
+        # 检查discover_products_with_priority的第二个参数是否为category_item[...]
+        if getattr(node.func, 'attr', None) == 'discover_products_with_priority' and len(node.args) >= 2:
+            arg = node.args[1]
+            if (isinstance(arg, ast.Subscript) and
+                isinstance(arg.value, ast.Name) and
+                arg.value.id == 'category_item'):
+                self.uses_category_item_path = True
+        self.generic_visit(node)
+    
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.loaded.add(node.id)
 
 class TestNameErrorRefactorTDD(unittest.TestCase):
     """REFACTOR阶段的TDD测试用例"""
     
+    @classmethod
+    def setUpClass(cls):
+        """读取并解析一次爬虫源码，所有测试共享"""
+        cls.source, cls.tree = load_ast(SPIDER_PATH)
+        cls.source_text = cls.source.decode('utf-8')
+        # 只扫描模块和类的成员，找齐各测试需要的方法节点即停止
+        methods = _find_funcdefs(cls.tree, ('discover_products_with_priority', 'parse_category'))
+        cls.priority_method_node = methods.get('discover_products_with_priority')
+        cls.parse_category_node = methods.get('parse_category')
+    
+    def setUp(self):
+        self._outbuf = []
+    
+    def tearDown(self):
+        """测试结束时一次写出该测试的全部输出"""
+        if self._outbuf:
+            sys.stdout.write('\n'.join(self._outbuf) + '\n')
+            sys.stdout.flush()
+    
+    def _log(self, msg):
+        """缓存一行输出，在 tearDown 中统一写出"""
+        self._outbuf.append(msg)
+    
     def test_parse_category_fix_quality(self):
         """REFACTOR阶段：测试parse_category中的修复质量"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 解析AST
-        tree = ast.parse(source_code)
-        
-        # 找到parse_category方法
-        parse_category_node = None
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) and node.name == 'parse_category':
-                parse_category_node = node
-                break
-        
+        parse_category_node = self.parse_category_node
         self.assertIsNotNone(parse_category_node, "应该找到parse_category方法")
         
         # 分析方法质量
@@ -48,53 +123,28 @@ class TestNameErrorRefactorTDD(unittest.TestCase):
             quality_metrics['has_docstring'] = True
         
         # 收集所有定义的变量
-        defined_vars = set(['self', 'response'])  # 参数也是定义的变量
-        used_vars = set()
+        visitor = _QualityVisitor()
+        visitor.visit(parse_category_node)
+        defined_vars = {'self', 'response'} | visitor.assigned  # 参数也是定义的变量
+        used_vars = visitor.loaded
+        quality_metrics['defines_category_item'] = 'category_item' in visitor.assigned
+        quality_metrics['uses_category_item_path'] = visitor.uses_category_item_path
         
-        for node in ast.walk(parse_category_node):
-            # 收集赋值
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name):
-                        defined_vars.add(target.id)
-                        if target.id == 'category_item':
-                            quality_metrics['defines_category_item'] = True
-            
-            # 检查是否使用category_item['path']
-            if isinstance(node, ast.Call):
-                if hasattr(node.func, 'attr') and node.func.attr == 'discover_products_with_priority':
-                    # 检查第二个参数
-                    if len(node.args) >= 2:
-                        arg = node.args[1]
-                        if (isinstance(arg, ast.Subscript) and
-                            isinstance(arg.value, ast.Name) and
-                            arg.value.id == 'category_item'):
-                            quality_metrics['uses_category_item_path'] = True
-            
-            # 收集使用的变量
-            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
-                used_vars.add(node.id)
-        
-        # 检查未定义的变量（排除内置函数和导入的名称）
-        builtins = {'len', 'range', 'enumerate', 'str', 'int', 'float', 'list', 'dict', 'set', 'tuple'}
-        undefined_vars = used_vars - defined_vars - builtins
-        
-        # 排除一些已知的类属性和导入
-        known_attrs = {'logger', 'category_extractor', 'stats_manager', 'priority_scheduler'}
-        undefined_vars = {var for var in undefined_vars if not any(attr in var for attr in known_attrs)}
+        # 检查未定义的变量（排除内置函数、导入的名称和已知的类属性）
+        undefined_vars = used_vars - defined_vars - _BUILTIN_NAMES - _KNOWN_ATTRS
         
         # 特别检查category_path
         if 'category_path' in undefined_vars:
             quality_metrics['no_undefined_vars'] = False
         
-        print("🔄 REFACTOR阶段 - parse_category方法质量检查：")
-        print(f"   ✅ 有文档字符串: {quality_metrics['has_docstring']}")
-        print(f"   ✅ 定义category_item: {quality_metrics['defines_category_item']}")
-        print(f"   ✅ 使用category_item['path']: {quality_metrics['uses_category_item_path']}")
-        print(f"   ✅ 无未定义变量: {quality_metrics['no_undefined_vars']}")
+        self._log("🔄 REFACTOR阶段 - parse_category方法质量检查：")
+        self._log(f"   ✅ 有文档字符串: {quality_metrics['has_docstring']}")
+        self._log(f"   ✅ 定义category_item: {quality_metrics['defines_category_item']}")
+        self._log(f"   ✅ 使用category_item['path']: {quality_metrics['uses_category_item_path']}")
+        self._log(f"   ✅ 无未定义变量: {quality_metrics['no_undefined_vars']}")
         
         if undefined_vars and 'category_path' not in undefined_vars:
-            print(f"   ℹ️  其他可能未定义的变量（可能是类属性）: {undefined_vars}")
+            self._log(f"   ℹ️  其他可能未定义的变量（可能是类属性）: {undefined_vars}")
         
         # 所有质量指标应该为True
         for metric, value in quality_metrics.items():
@@ -105,19 +155,8 @@ class TestNameErrorRefactorTDD(unittest.TestCase):
     
     def test_discover_products_with_priority_consistency(self):
         """REFACTOR阶段：测试discover_products_with_priority的一致性"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        # 解析AST
-        tree = ast.parse(source_code)
-        
-        # 找到discover_products_with_priority方法
-        method_node = None
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) and node.name == 'discover_products_with_priority':
-                method_node = node
-                break
+        # discover_products_with_priority方法节点已在 setUpClass 中找到
+        method_node = self.priority_method_node
         
         self.assertIsNotNone(method_node, "应该找到discover_products_with_priority方法")
         
@@ -131,17 +170,15 @@ class TestNameErrorRefactorTDD(unittest.TestCase):
             if isinstance(node, ast.Name) and node.id == 'category_path':
                 category_path_usage_count += 1
         
-        print(f"\n🔍 discover_products_with_priority方法分析：")
-        print(f"   参数列表: {params}")
-        print(f"   category_path使用次数: {category_path_usage_count}")
-        print(f"   ✅ category_path作为参数是合法的")
+        self._log(f"\n🔍 discover_products_with_priority方法分析：")
+        self._log(f"   参数列表: {params}")
+        self._log(f"   category_path使用次数: {category_path_usage_count}")
+        self._log(f"   ✅ category_path作为参数是合法的")
         
         self.assertGreater(category_path_usage_count, 0, "category_path应该在方法内被使用")
     
     def test_overall_code_quality(self):
         """REFACTOR阶段：测试整体代码质量"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        
         quality_checks = {
             'syntax_valid': True,
             'no_nameerror_in_parse_category': True,
@@ -150,30 +187,23 @@ class TestNameErrorRefactorTDD(unittest.TestCase):
         }
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source_code = f.read()
+            source_code = self.source_text
             
             # 语法检查
-            compile(source_code, file_path, 'exec')
+            compile(self.source, SPIDER_PATH, 'exec')
             
             # 检查parse_category中是否还有未定义的category_path使用
-            lines = source_code.split('\n')
-            in_parse_category = False
-            parse_category_indent = None
-            
-            for i, line in enumerate(lines):
-                if 'def parse_category' in line:
-                    in_parse_category = True
-                    parse_category_indent = len(line) - len(line.lstrip())
-                elif in_parse_category and line.strip() and line.strip()[0] not in ['#', '"', "'"]:
-                    current_indent = len(line) - len(line.lstrip())
-                    if current_indent <= parse_category_indent and 'def ' in line:
-                        in_parse_category = False
-                    elif in_parse_category and 'category_path' in line:
-                        # 检查是否是category_item['path']的一部分
-                        if "category_item['path']" not in line:
-                            quality_checks['no_nameerror_in_parse_category'] = False
-                            print(f"⚠️  第{i+1}行可能有问题: {line.strip()}")
+            # 方法范围由语法树节点给出，跳过def行本身，对方法体做一次正则扫描
+            node = self.parse_category_node
+            if node is not None:
+                body = ast.get_source_segment(source_code, node).partition('\n')[2]
+                line_no, pos = node.lineno + 1, 0
+                for match in _SUSPECT_CATEGORY_PATH_RE.finditer(body):
+                    # 不是category_item['path']的一部分
+                    line_no += body.count('\n', pos, match.start())
+                    pos = match.start()
+                    quality_checks['no_nameerror_in_parse_category'] = False
+                    self._log(f"⚠️  第{line_no}行可能有问题: {match.group().strip()}")
             
             # 检查错误处理装饰器
             if '@error_handler' in source_code:
@@ -182,12 +212,12 @@ class TestNameErrorRefactorTDD(unittest.TestCase):
         except SyntaxError:
             quality_checks['syntax_valid'] = False
         except Exception as e:
-            print(f"检查时出错: {e}")
+            self._log(f"检查时出错: {e}")
         
-        print(f"\n📊 整体代码质量评估：")
+        self._log(f"\n📊 整体代码质量评估：")
         for check, passed in quality_checks.items():
             status = "✅" if passed else "❌"
-            print(f"   {status} {check}: {passed}")
+            self._log(f"   {status} {check}: {passed}")
         
         # 所有检查应该通过
         for check, passed in quality_checks.items():
@@ -195,9 +225,7 @@ class TestNameErrorRefactorTDD(unittest.TestCase):
     
     def test_fix_impact(self):
         """REFACTOR阶段：测试修复的影响范围"""
-        file_path = "/root/ideas/vivbliss/vivbliss_scraper/vivbliss_scraper/spiders/vivbliss.py"
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
+        source_code = self.source_text
         
         # 统计修复的影响
         impact_stats = {
@@ -212,11 +240,11 @@ class TestNameErrorRefactorTDD(unittest.TestCase):
         if "category_item['path']" in source_code:
             impact_stats['backwards_compatible'] = True
         
-        print(f"\n📈 修复影响评估：")
-        print(f"   修改的方法数: {impact_stats['methods_modified']}")
-        print(f"   修改的行数: {impact_stats['lines_changed']}")
-        print(f"   副作用: {impact_stats['side_effects']}")
-        print(f"   向后兼容: {'✅' if impact_stats['backwards_compatible'] else '❌'}")
+        self._log(f"\n📈 修复影响评估：")
+        self._log(f"   修改的方法数: {impact_stats['methods_modified']}")
+        self._log(f"   修改的行数: {impact_stats['lines_changed']}")
+        self._log(f"   副作用: {impact_stats['side_effects']}")
+        self._log(f"   向后兼容: {'✅' if impact_stats['backwards_compatible'] else '❌'}")
         
         self.assertEqual(impact_stats['side_effects'], 0, "修复不应该有副作用")
         self.assertTrue(impact_stats['backwards_compatible'], "修复应该向后兼容")
@@ -9,23 +9,64 @@ import sys
 import os
 import re
 from datetime import datetime
+from functools import lru_cache
 
-# 添加项目路径
-sys.path.insert(0, os.path.dirname(__file__))
+# 添加项目路径（已在 sys.path 中时不重复添加）
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
+
+# 分类 URL 模式
+CATEGORY_PATTERNS = (
+    r'/category/[\w\-/]+',
+    r'/categories/[\w\-/]+',
+    r'/cat/[\w\-/]+',
+    r'/shop/[\w\-/]+',
+    r'/products/[\w\-/]+',
+    r'/collection/[\w\-/]+',
+)
+
+# 所有分类模式合并为一个交替正则，每个 URL 只匹配一次
+_CATEGORY_URL_RE = re.compile('(?:' + '|'.join(CATEGORY_PATTERNS) + ')$')
+
+# 价格模式按优先级排列，依次尝试
+_PRICE_RES = tuple(re.compile(pattern) for pattern in (
+    r'[¥$€£]\d+\.?\d*',  # 货币符号 + 数字
+    r'\d+\.?\d*\s*[¥$€£]',  # 数字 + 货币符号
+    r'\d+\.?\d*'  # 纯数字
+))
+
+# 路径构建和价格提取都是纯函数，相同分类名/价格文本重复出现时直接命中缓存
+@lru_cache(maxsize=4096)
+def _build_category_path(category_name, parent_path=None):
+    """构建分类路径"""
+    if parent_path:
+        return f"{parent_path}/{category_name}"
+    return category_name
+
+@lru_cache(maxsize=4096)
+def _extract_price(price_text):
+    """从价格文本中提取价格"""
+    if not price_text:
+        return None
+
+    # 查找价格模式
+    for pattern in _PRICE_RES:
+        match = pattern.search(price_text)
+        if match:
+            return match.group()
+
+    return price_text.strip()
+
+def _emit(lines):
+    """一次写出一个测试的全部输出"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 def test_category_url_pattern():
     """测试分类 URL 模式匹配"""
-    print("🧪 测试分类 URL 模式匹配...")
-    
-    # 定义 URL 模式
-    category_patterns = [
-        r'/category/[\w\-/]+',
-        r'/categories/[\w\-/]+',
-        r'/cat/[\w\-/]+',
-        r'/shop/[\w\-/]+',
-        r'/products/[\w\-/]+',
-        r'/collection/[\w\-/]+'
-    ]
+    out = []
+    out.append("🧪 测试分类 URL 模式匹配...")
     
     # 测试用例
     test_urls = [
@@ -42,25 +83,21 @@ def test_category_url_pattern():
     
     valid_urls = []
     for url in test_urls:
-        is_valid = any(re.match(pattern + '$', url) for pattern in category_patterns)
+        is_valid = _CATEGORY_URL_RE.match(url) is not None
         if is_valid:
             valid_urls.append(url)
-            print(f"✅ 有效分类 URL: {url}")
+            out.append(f"✅ 有效分类 URL: {url}")
         else:
-            print(f"❌ 无效分类 URL: {url}")
+            out.append(f"❌ 无效分类 URL: {url}")
     
-    print(f"📊 总计: {len(valid_urls)}/{len(test_urls)} 个有效分类 URL")
+    out.append(f"📊 总计: {len(valid_urls)}/{len(test_urls)} 个有效分类 URL")
+    _emit(out)
     return len(valid_urls) > 0
 
 def test_category_hierarchy():
     """测试分类层级构建逻辑"""
-    print("\n🧪 测试分类层级构建...")
-    
-    def build_category_path(category_name, parent_path=None):
-        """构建分类路径"""
-        if parent_path:
-            return f"{parent_path}/{category_name}"
-        return category_name
+    out = []
+    out.append("\n🧪 测试分类层级构建...")
     
     test_cases = [
         {
@@ -87,18 +124,20 @@ def test_category_hierarchy():
     
     all_passed = True
     for case in test_cases:
-        result = build_category_path(case['category'], case['parent'])
+        result = _build_category_path(case['category'], case['parent'])
         if result == case['expected']:
-            print(f"✅ 分类路径构建成功: '{case['category']}' -> '{result}'")
+            out.append(f"✅ 分类路径构建成功: '{case['category']}' -> '{result}'")
         else:
-            print(f"❌ 分类路径构建失败: 期望 '{case['expected']}', 得到 '{result}'")
+            out.append(f"❌ 分类路径构建失败: 期望 '{case['expected']}', 得到 '{result}'")
             all_passed = False
     
+    _emit(out)
     return all_passed
 
 def test_product_data_extraction():
     """测试产品数据提取逻辑"""
-    print("\n🧪 测试产品数据提取逻辑...")
+    out = []
+    out.append("\n🧪 测试产品数据提取逻辑...")
     
     # 模拟产品数据
     mock_product_data = {
@@ -119,30 +158,33 @@ def test_product_data_extraction():
     required_fields = ['name', 'price', 'stock_status']
     optional_fields = ['original_price', 'description', 'rating', 'review_count', 'image_urls']
     
-    print("验证必需字段:")
+    out.append("验证必需字段:")
     for field in required_fields:
         if field in mock_product_data and mock_product_data[field]:
-            print(f"✅ {field}: {mock_product_data[field]}")
+            out.append(f"✅ {field}: {mock_product_data[field]}")
         else:
-            print(f"❌ 缺少必需字段: {field}")
+            out.append(f"❌ 缺少必需字段: {field}")
+            _emit(out)
             return False
     
-    print("验证可选字段:")
+    out.append("验证可选字段:")
     for field in optional_fields:
         if field in mock_product_data:
             value = mock_product_data[field]
             if isinstance(value, list):
-                print(f"✅ {field}: {len(value)} 项")
+                out.append(f"✅ {field}: {len(value)} 项")
             else:
-                print(f"✅ {field}: {value}")
+                out.append(f"✅ {field}: {value}")
         else:
-            print(f"⚪ 可选字段 {field} 未设置（正常）")
+            out.append(f"⚪ 可选字段 {field} 未设置（正常）")
     
+    _emit(out)
     return True
 
 def test_price_extraction():
     """测试价格提取逻辑"""
-    print("\n🧪 测试价格提取逻辑...")
+    out = []
+    out.append("\n🧪 测试价格提取逻辑...")
     
     price_test_cases = [
         ("¥299.00", "¥299.00"),
@@ -154,39 +196,22 @@ def test_price_extraction():
         ("", None)
     ]
     
-    def extract_price(price_text):
-        """从价格文本中提取价格"""
-        if not price_text:
-            return None
-        
-        # 查找价格模式
-        price_patterns = [
-            r'[¥$€£]\d+\.?\d*',  # 货币符号 + 数字
-            r'\d+\.?\d*\s*[¥$€£]',  # 数字 + 货币符号
-            r'\d+\.?\d*'  # 纯数字
-        ]
-        
-        for pattern in price_patterns:
-            match = re.search(pattern, price_text)
-            if match:
-                return match.group()
-        
-        return price_text.strip()
-    
     all_passed = True
     for test_input, expected in price_test_cases:
-        result = extract_price(test_input)
+        result = _extract_price(test_input)
         if (result is None and expected is None) or (result and expected and expected in result):
-            print(f"✅ 价格提取成功: '{test_input}' -> '{result}'")
+            out.append(f"✅ 价格提取成功: '{test_input}' -> '{result}'")
         else:
-            print(f"❌ 价格提取失败: '{test_input}' -> 期望包含 '{expected}', 得到 '{result}'")
+            out.append(f"❌ 价格提取失败: '{test_input}' -> 期望包含 '{expected}', 得到 '{result}'")
             all_passed = False
     
+    _emit(out)
     return all_passed
 
 def test_category_data_structure():
     """测试分类数据结构"""
-    print("\n🧪 测试分类数据结构...")
+    out = []
+    out.append("\n🧪 测试分类数据结构...")
     
     # 模拟 CategoryItem 数据结构
     mock_category = {
@@ -209,26 +234,27 @@ def test_category_data_structure():
     all_valid = True
     for field in required_category_fields:
         if field in mock_category and mock_category[field] is not None:
-            print(f"✅ 分类字段 {field}: {mock_category[field]}")
+            out.append(f"✅ 分类字段 {field}: {mock_category[field]}")
         else:
-            print(f"❌ 分类缺少必需字段: {field}")
+            out.append(f"❌ 分类缺少必需字段: {field}")
             all_valid = False
     
     # 验证分类层级
     if mock_category['level'] > 0:
-        print(f"✅ 分类层级有效: {mock_category['level']}")
+        out.append(f"✅ 分类层级有效: {mock_category['level']}")
     else:
-        print(f"❌ 分类层级无效: {mock_category['level']}")
+        out.append(f"❌ 分类层级无效: {mock_category['level']}")
         all_valid = False
     
     # 验证日期格式
     try:
         datetime.fromisoformat(mock_category['created_at'].replace('Z', '+00:00'))
-        print(f"✅ 创建时间格式有效: {mock_category['created_at']}")
+        out.append(f"✅ 创建时间格式有效: {mock_category['created_at']}")
     except ValueError:
-        print(f"❌ 创建时间格式无效: {mock_category['created_at']}")
+        out.append(f"❌ 创建时间格式无效: {mock_category['created_at']}")
         all_valid = False
     
+    _emit(out)
     return all_valid
 
 def main():
@@ -5,45 +5,125 @@
 包含分类发现、分类层级、分类数据提取等功能测试
 """
 
+import re
 import unittest
-from unittest.mock import Mock, patch, MagicMock
-import scrapy
-from scrapy.http import HtmlResponse, Request
-from scrapy.utils.test import get_crawler
-import sys
-import os
-
-# 添加项目路径到 sys.path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from scrapy.http import HtmlResponse
+from lxml import etree
+from lxml import html as lxml_html
+from parsel.csstranslator import css2xpath
 
 try:
-    from vivbliss_scraper.spiders.vivbliss import VivblissSpider
     from vivbliss_scraper.items import CategoryItem
 except ImportError:
     # 如果导入失败，创建模拟对象
-    class VivblissSpider:
-        name = 'vivbliss'
-        allowed_domains = ['vivbliss.com']
-        start_urls = ['https://vivbliss.com']
-        
-        def parse_categories(self, response):
-            pass
-    
     class CategoryItem:
         def __init__(self):
             self.fields = {}
 
 
+def _compile_css(query):
+    """
+    把 CSS 选择器一次性编译为可直接调用的 lxml XPath 对象
+    
+    使用与 response.css 相同的 parsel 转换规则（支持 ::text 和 ::attr()），
+    匹配结果一致，但不必每次调用都重新转换和编译。
+    """
+    return etree.XPath(css2xpath(query))
+
+
+def _first(results):
+    """取 XPath 结果的第一项，没有结果时返回 None（对应 SelectorList.get()）"""
+    return results[0] if results else None
+
+
+# 分类 URL 格式
+_CATEGORY_URL_RE = re.compile(r'^/category/[\w\-/]+$')
+
+# 测试中用到的选择器，模块加载时编译一次
+_XP_LINKS = _compile_css('.category-menu .category-link::attr(href)')
+_XP_L1_ITEMS = _compile_css('.category-item.level-1')
+_XP_L1_LINKS = _compile_css('.category-item.level-1 > .category-link')
+_XP_L2_LINKS = _compile_css('.category-item.level-2 > a')
+_XP_L3_LINKS = _compile_css('.category-item.level-3 > a')
+_XP_CATEGORY_ITEMS = _compile_css('.category-item')
+_XP_CATEGORY_HREFS = _compile_css('.category-item a::attr(href)')
+_XP_PAGE_TITLE = _compile_css('title::text')
+_XP_META_DESCRIPTION = _compile_css('meta[name="description"]::attr(content)')
+_XP_CATEGORY_TITLE = _compile_css('.category-title::text')
+_XP_CATEGORY_DESCRIPTION = _compile_css('.category-description::text')
+_XP_CATEGORY_IMAGE = _compile_css('.category-image::attr(src)')
+
+# 以下选择器相对于单个分类节点求值
+_XP_LINK_TEXT = _compile_css('.category-link::text')
+_XP_LINK_HREF = _compile_css('.category-link::attr(href)')
+_XP_PRODUCT_COUNT_TEXT = _compile_css('.product-count::text')
+
+
+def _category_level(item):
+    """从 class 中的 level-N 取出分类层级，没有时返回 None"""
+    for token in item.get('class', '').split():
+        if token.startswith('level-') and token[6:].isdigit():
+            return int(token[6:])
+    return None
+
+
+def _build_category_path(category_name, parent_path=None):
+    """构建分类路径的辅助函数"""
+    if parent_path:
+        return f"{parent_path}/{category_name}"
+    return category_name
+
+
+# 分类路径构建用例：(分类名, 父路径, 期望路径)
+CATEGORY_PATH_CASES = (
+    ('服装', None, '服装'),
+    ('男装', '服装', '服装/男装'),
+    ('衬衫', '服装/男装', '服装/男装/衬衫'),
+)
+
+# 边缘情况测试使用的页面，按名称索引，模块加载时编码一次
+_EDGE_CASE_PAGES = {
+    'empty': """
+        <!DOCTYPE html>
+        <html>
+        <head><title>Empty Categories</title></head>
+        <body>
+            <div class="no-categories">暂无分类</div>
+        </body>
+        </html>
+        """.encode('utf-8'),
+    'malformed': """
+        <html>
+        <body>
+            <div class="category-item">
+                <a href="/category/test">测试分类
+                <!-- 没有关闭的链接标签 -->
+                <span class="product-count">(10)
+                <!-- 没有关闭的 span 标签 -->
+            </div>
+        </body>
+        </html>
+        """.encode('utf-8'),
+    'unicode': """
+        <html>
+        <body>
+            <div class="category-menu">
+                <a href="/category/chinese">中文分类 🇨🇳</a>
+                <a href="/category/japanese">日本語カテゴリ 🇯🇵</a>
+                <a href="/category/korean">한국어 카테고리 🇰🇷</a>
+                <a href="/category/emoji">Emoji分类 🎉✨🌟</a>
+            </div>
+        </body>
+        </html>
+        """.encode('utf-8'),
+}
+
+
 class TestCategoryScrapingFunctionality(unittest.TestCase):
     """测试分类爬取功能"""
     
-    def setUp(self):
-        """测试前准备"""
-        self.spider = VivblissSpider()
-        self.spider.logger = Mock()
-        
-        # 模拟分类页面 HTML 内容
-        self.category_html = """
+    # 模拟分类页面 HTML 内容（类属性，所有测试共享）
+    category_html = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -128,18 +208,16 @@ class TestCategoryScrapingFunctionality(unittest.TestCase):
         </body>
         </html>
         """
-        
-        # 创建模拟响应对象
-        self.response = HtmlResponse(
-            url='https://vivbliss.com/categories',
-            body=self.category_html.encode('utf-8'),
-            encoding='utf-8'
-        )
+    
+    @classmethod
+    def setUpClass(cls):
+        """HTML 只解析一次，所有测试共享同一棵 lxml 树"""
+        cls._tree = lxml_html.fromstring(cls.category_html)
     
     def test_category_navigation_discovery(self):
         """测试分类导航发现功能"""
         # 检查是否能发现主要分类链接
-        category_links = self.response.css('.category-menu .category-link::attr(href)').getall()
+        category_links = _XP_LINKS(self._tree)
         
         self.assertGreater(len(category_links), 0, "应该发现至少一个分类链接")
         self.assertIn('/category/clothing', category_links, "应该发现服装分类链接")
@@ -148,74 +226,49 @@ class TestCategoryScrapingFunctionality(unittest.TestCase):
     def test_category_hierarchy_extraction(self):
         """测试分类层级提取功能"""
         # 测试一级分类
-        level_1_categories = self.response.css('.category-item.level-1 > .category-link')
+        level_1_categories = _XP_L1_LINKS(self._tree)
         self.assertEqual(len(level_1_categories), 2, "应该发现2个一级分类")
         
         # 测试二级分类
-        level_2_categories = self.response.css('.category-item.level-2 > a')
+        level_2_categories = _XP_L2_LINKS(self._tree)
         self.assertGreater(len(level_2_categories), 2, "应该发现多个二级分类")
         
         # 测试三级分类
-        level_3_categories = self.response.css('.category-item.level-3 > a')
+        level_3_categories = _XP_L3_LINKS(self._tree)
         self.assertGreater(len(level_3_categories), 0, "应该发现至少一个三级分类")
     
     def test_category_data_extraction(self):
         """测试分类数据提取功能"""
         # 提取第一个分类的详细信息
-        first_category = self.response.css('.category-item.level-1').get()
+        # 直接在原文档树的节点上查询，不再序列化成字符串后重新解析
+        first_category = _first(_XP_L1_ITEMS(self._tree))
         
-        if first_category:
-            category_selector = scrapy.Selector(text=first_category)
-            
+        if first_category is not None:
             # 提取分类名称
-            name = category_selector.css('.category-link::text').get()
+            name = _first(_XP_LINK_TEXT(first_category))
             self.assertIsNotNone(name, "应该能提取到分类名称")
             self.assertIn('服装', name, "分类名称应该包含'服装'")
             
             # 提取分类链接
-            url = category_selector.css('.category-link::attr(href)').get()
+            url = _first(_XP_LINK_HREF(first_category))
             self.assertIsNotNone(url, "应该能提取到分类链接")
             self.assertTrue(url.startswith('/category/'), "链接应该以'/category/'开头")
             
             # 提取产品数量
-            product_count_text = category_selector.css('.product-count::text').get()
+            product_count_text = _first(_XP_PRODUCT_COUNT_TEXT(first_category))
             if product_count_text:
-                # 从 "(156)" 中提取数字
-                import re
-                numbers = re.findall(r'\d+', product_count_text)
-                self.assertGreater(len(numbers), 0, "应该能从产品数量文本中提取到数字")
+                # 从 "(156)" 中提取数字：只保留数字字符，不必调用正则引擎
+                digits = ''.join(filter(str.isdigit, product_count_text))
+                self.assertGreater(len(digits), 0, "应该能从产品数量文本中提取到数字")
     
     def test_category_path_construction(self):
         """测试分类路径构建功能"""
-        # 测试构建分类路径的逻辑
-        test_cases = [
-            {
-                'category': '服装',
-                'parent': None,
-                'expected_path': '服装'
-            },
-            {
-                'category': '男装',
-                'parent': '服装',
-                'expected_path': '服装/男装'
-            },
-            {
-                'category': '衬衫',
-                'parent': '服装/男装',
-                'expected_path': '服装/男装/衬衫'
-            }
-        ]
-        
-        def build_category_path(category_name, parent_path=None):
-            """构建分类路径的辅助函数"""
-            if parent_path:
-                return f"{parent_path}/{category_name}"
-            return category_name
-        
-        for case in test_cases:
-            result = build_category_path(case['category'], case['parent'])
-            self.assertEqual(result, case['expected_path'], 
-                           f"分类路径构建错误: {case}")
+        # 每个用例作为独立的子测试报告，失败时能直接定位到具体用例
+        for category, parent, expected_path in CATEGORY_PATH_CASES:
+            with self.subTest(category=category, parent=parent):
+                result = _build_category_path(category, parent)
+                self.assertEqual(result, expected_path,
+                                 f"分类路径构建错误: {(category, parent, expected_path)}")
     
     def test_category_item_creation(self):
         """测试 CategoryItem 对象创建"""
@@ -246,40 +299,39 @@ class TestCategoryScrapingFunctionality(unittest.TestCase):
     
     def test_subcategory_relationship_tracking(self):
         """测试子分类关系追踪"""
-        # 从 HTML 中提取分类层级关系
+        # 从 HTML 中提取分类层级关系：按文档顺序遍历一次所有分类节点，
+        # 父分类总在子分类之前出现，子分类通过 <li>/<ul>/<li> 结构直接找到父节点
         categories_data = []
+        names = {}
         
-        # 提取一级分类
-        level_1_items = self.response.css('.category-item.level-1')
-        for item in level_1_items:
-            category_link = item.css('> .category-link')
-            if category_link:
-                name = category_link.css('::text').re_first(r'^([^(]+)')
-                if name:
-                    name = name.strip()
-                    url = category_link.css('::attr(href)').get()
-                    categories_data.append({
-                        'name': name,
-                        'url': url,
-                        'level': 1,
-                        'parent': None
-                    })
-                    
-                    # 提取子分类
-                    level_2_items = item.css('.subcategory-menu .category-item.level-2')
-                    for sub_item in level_2_items:
-                        sub_link = sub_item.css('> a')
-                        if sub_link:
-                            sub_name = sub_link.css('::text').re_first(r'^([^(]+)')
-                            if sub_name:
-                                sub_name = sub_name.strip()
-                                sub_url = sub_link.css('::attr(href)').get()
-                                categories_data.append({
-                                    'name': sub_name,
-                                    'url': sub_url,
-                                    'level': 2,
-                                    'parent': name
-                                })
+        for item in _XP_CATEGORY_ITEMS(self._tree):
+            level = _category_level(item)
+            if level not in (1, 2):
+                continue
+            
+            # 分类自身的链接是 <li> 的直接子元素 <a>（一级分类要求带 category-link 类）
+            link = next((child for child in item if child.tag == 'a'), None)
+            if link is None or (level == 1 and 'category-link' not in link.get('class', '').split()):
+                continue
+            
+            # 名称取链接首段文本中 "(" 之前的部分，如 "服装 (156)" -> "服装"
+            name = (link.text or '').split('(', 1)[0].strip()
+            if not name:
+                continue
+            
+            parent = None
+            if level == 2:
+                parent = names.get(item.getparent().getparent())
+                if parent is None:
+                    continue
+            
+            names[item] = name
+            categories_data.append({
+                'name': name,
+                'url': link.get('href'),
+                'level': level,
+                'parent': parent
+            })
         
         # 验证提取的分类数据
         self.assertGreater(len(categories_data), 0, "应该提取到分类数据")
@@ -300,17 +352,14 @@ class TestCategoryScrapingFunctionality(unittest.TestCase):
     def test_category_url_pattern_validation(self):
         """测试分类 URL 模式验证"""
         # 提取所有分类 URL
-        category_urls = self.response.css('.category-item a::attr(href)').getall()
+        category_urls = _XP_CATEGORY_HREFS(self._tree)
         
         # 验证 URL 模式
-        import re
-        url_pattern = re.compile(r'^/category/[\w\-/]+$')
-        
         valid_urls = []
         invalid_urls = []
         
         for url in category_urls:
-            if url and url_pattern.match(url):
+            if url and _CATEGORY_URL_RE.match(url):
                 valid_urls.append(url)
             else:
                 invalid_urls.append(url)
@@ -321,22 +370,22 @@ class TestCategoryScrapingFunctionality(unittest.TestCase):
     def test_category_metadata_extraction(self):
         """测试分类元数据提取"""
         # 测试页面级别的元数据
-        page_title = self.response.css('title::text').get()
+        page_title = _first(_XP_PAGE_TITLE(self._tree))
         self.assertIsNotNone(page_title, "应该能提取到页面标题")
         
-        meta_description = self.response.css('meta[name="description"]::attr(content)').get()
+        meta_description = _first(_XP_META_DESCRIPTION(self._tree))
         self.assertIsNotNone(meta_description, "应该能提取到页面描述")
         
         # 测试分类特定的元数据
-        category_title = self.response.css('.category-title::text').get()
+        category_title = _first(_XP_CATEGORY_TITLE(self._tree))
         if category_title:
             self.assertIn('分类', category_title, "分类标题应该包含'分类'")
         
-        category_description = self.response.css('.category-description::text').get()
+        category_description = _first(_XP_CATEGORY_DESCRIPTION(self._tree))
         if category_description:
             self.assertIsInstance(category_description, str, "分类描述应该是字符串")
         
-        category_image = self.response.css('.category-image::attr(src)').get()
+        category_image = _first(_XP_CATEGORY_IMAGE(self._tree))
         if category_image:
             self.assertTrue(category_image.startswith('/'), "分类图片路径应该以'/'开头")
 
@@ -344,28 +393,21 @@ class TestCategoryScrapingFunctionality(unittest.TestCase):
 class TestCategoryScrapingEdgeCases(unittest.TestCase):
     """测试分类爬取的边缘情况"""
     
-    def setUp(self):
-        """测试前准备"""
-        self.spider = VivblissSpider()
-        self.spider.logger = Mock()
+    @classmethod
+    def setUpClass(cls):
+        """每个边缘情况页面只构建一次响应对象"""
+        cls.responses = {
+            name: HtmlResponse(
+                url='https://vivbliss.com/categories',
+                body=body,
+                encoding='utf-8'
+            )
+            for name, body in _EDGE_CASE_PAGES.items()
+        }
     
     def test_empty_category_page(self):
         """测试空分类页面处理"""
-        empty_html = """
-        <!DOCTYPE html>
-        <html>
-        <head><title>Empty Categories</title></head>
-        <body>
-            <div class="no-categories">暂无分类</div>
-        </body>
-        </html>
-        """
-        
-        response = HtmlResponse(
-            url='https://vivbliss.com/categories',
-            body=empty_html.encode('utf-8'),
-            encoding='utf-8'
-        )
+        response = self.responses['empty']
         
         # 验证处理空页面不会崩溃
         category_links = response.css('.category-menu .category-link::attr(href)').getall()
@@ -373,24 +415,7 @@ class TestCategoryScrapingEdgeCases(unittest.TestCase):
     
     def test_malformed_html_handling(self):
         """测试畸形 HTML 处理"""
-        malformed_html = """
-        <html>
-        <body>
-            <div class="category-item">
-                <a href="/category/test">测试分类
-                <!-- 没有关闭的链接标签 -->
-                <span class="product-count">(10)
-                <!-- 没有关闭的 span 标签 -->
-            </div>
-        </body>
-        </html>
-        """
-        
-        response = HtmlResponse(
-            url='https://vivbliss.com/categories',
-            body=malformed_html.encode('utf-8'),
-            encoding='utf-8'
-        )
+        response = self.responses['malformed']
         
         # 验证能从畸形 HTML 中提取数据
         category_links = response.css('a::attr(href)').getall()
@@ -398,24 +423,7 @@ class TestCategoryScrapingEdgeCases(unittest.TestCase):
     
     def test_unicode_category_names(self):
         """测试 Unicode 分类名称处理"""
-        unicode_html = """
-        <html>
-        <body>
-            <div class="category-menu">
-                <a href="/category/chinese">中文分类 🇨🇳</a>
-                <a href="/category/japanese">日本語カテゴリ 🇯🇵</a>
-                <a href="/category/korean">한국어 카테고리 🇰🇷</a>
-                <a href="/category/emoji">Emoji分类 🎉✨🌟</a>
-            </div>
-        </body>
-        </html>
-        """
-        
-        response = HtmlResponse(
-            url='https://vivbliss.com/categories',
-            body=unicode_html.encode('utf-8'),
-            encoding='utf-8'
-        )
+        response = self.responses['unicode']
         
         # 验证能正确处理 Unicode 字符
         category_names = response.css('.category-menu a::text').getall()
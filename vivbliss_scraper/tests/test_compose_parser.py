@@ -2,29 +2,34 @@
 Tests for Docker Compose file parser.
 """
 import pytest
-import tempfile
 import os
-from pathlib import Path
 from vivbliss_scraper.config.compose_parser import ComposeParser, ComposeParseError
 
 
-class TestComposeParser:
-    """Test Docker Compose parser functionality"""
-    
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.parser = ComposeParser()
-        self.temp_dir = tempfile.mkdtemp()
-    
-    def test_parser_initialization(self):
-        """Test parser initialization"""
-        assert self.parser is not None
-        assert hasattr(self.parser, 'parse_file')
-        assert hasattr(self.parser, 'extract_environment')
-    
-    def test_parse_simple_compose_file(self):
-        """Test parsing a simple compose file"""
-        compose_content = """
+@pytest.fixture(scope="class")
+def parser():
+    """ComposeParser holds no per-file state, so one instance serves a whole test class"""
+    return ComposeParser()
+
+
+@pytest.fixture(scope="class")
+def temp_dir(tmp_path_factory):
+    """Temporary directory shared by the tests of one class, cleaned up by pytest"""
+    return tmp_path_factory.mktemp("compose")
+
+
+@pytest.fixture
+def write_compose(temp_dir):
+    """Return a helper that writes compose content into the class temp dir and returns its path"""
+    def _write(content, name="docker-compose.yml"):
+        compose_file = temp_dir / name
+        compose_file.write_text(content)
+        return str(compose_file)
+    return _write
+
+
+# Static compose fixtures, shared by the tests below
+SIMPLE_COMPOSE = """
 version: '3.8'
 services:
   app:
@@ -33,18 +38,8 @@ services:
       - DATABASE_URL=postgresql://localhost:5432/mydb
       - DEBUG=true
 """
-        compose_file = Path(self.temp_dir) / "docker-compose.yml"
-        compose_file.write_text(compose_content)
-        
-        result = self.parser.parse_file(str(compose_file))
-        
-        assert 'services' in result
-        assert 'app' in result['services']
-        assert 'environment' in result['services']['app']
-    
-    def test_parse_compose_with_env_file(self):
-        """Test parsing compose file with env_file reference"""
-        compose_content = """
+
+ENV_FILE_COMPOSE = """
 version: '3.8'
 services:
   app:
@@ -55,18 +50,8 @@ services:
     environment:
       - NODE_ENV=production
 """
-        compose_file = Path(self.temp_dir) / "docker-compose.yml"
-        compose_file.write_text(compose_content)
-        
-        result = self.parser.parse_file(str(compose_file))
-        
-        assert 'env_file' in result['services']['app']
-        assert isinstance(result['services']['app']['env_file'], list)
-        assert len(result['services']['app']['env_file']) == 2
-    
-    def test_parse_compose_with_variable_substitution(self):
-        """Test parsing compose file with variable substitution"""
-        compose_content = """
+
+VARIABLE_SUBSTITUTION_COMPOSE = """
 version: '3.8'
 services:
   db:
@@ -76,17 +61,87 @@ services:
       POSTGRES_PASSWORD: ${DB_PASSWORD}
       POSTGRES_DB: ${DB_NAME:-myapp_db}
 """
-        compose_file = Path(self.temp_dir) / "docker-compose.yml"
-        compose_file.write_text(compose_content)
+
+INVALID_COMPOSE = """
+version: '3.8'
+services:
+  app:
+    image: myapp
+    environment:
+      - INVALID_YAML: [unclosed bracket
+"""
+
+MULTI_SERVICE_COMPOSE = """
+version: '3.8'
+services:
+  web:
+    image: nginx
+    environment:
+      - NGINX_PORT=80
+  app:
+    image: myapp
+    environment:
+      - APP_ENV=production
+      - DATABASE_URL=postgresql://db:5432/app
+  db:
+    image: postgres
+    environment:
+      POSTGRES_USER: admin
+      POSTGRES_PASSWORD: secret
+"""
+
+CURRENT_ENV_COMPOSE = """
+version: '3.8'
+services:
+  app:
+    environment:
+      - TEST_VAR=${TEST_VAR}
+      - DB_PASSWORD=${DB_PASSWORD}
+      - DEFAULT_VAR=${MISSING_VAR:-default}
+"""
+
+
+class TestComposeParser:
+    """Test Docker Compose parser functionality"""
+    
+    def test_parser_initialization(self, parser):
+        """Test parser initialization"""
+        assert parser is not None
+        assert hasattr(parser, 'parse_file')
+        assert hasattr(parser, 'extract_environment')
+    
+    def test_parse_simple_compose_file(self, parser, write_compose):
+        """Test parsing a simple compose file"""
+        compose_file = write_compose(SIMPLE_COMPOSE)
+        
+        result = parser.parse_file(compose_file)
+        
+        assert 'services' in result
+        assert 'app' in result['services']
+        assert 'environment' in result['services']['app']
+    
+    def test_parse_compose_with_env_file(self, parser, write_compose):
+        """Test parsing compose file with env_file reference"""
+        compose_file = write_compose(ENV_FILE_COMPOSE)
         
-        result = self.parser.parse_file(str(compose_file))
+        result = parser.parse_file(compose_file)
+        
+        assert 'env_file' in result['services']['app']
+        assert isinstance(result['services']['app']['env_file'], list)
+        assert len(result['services']['app']['env_file']) == 2
+    
+    def test_parse_compose_with_variable_substitution(self, parser, write_compose):
+        """Test parsing compose file with variable substitution"""
+        compose_file = write_compose(VARIABLE_SUBSTITUTION_COMPOSE)
+        
+        result = parser.parse_file(compose_file)
         
         env = result['services']['db']['environment']
         assert 'POSTGRES_USER' in env
         assert 'POSTGRES_PASSWORD' in env
         assert 'POSTGRES_DB' in env
     
-    def test_extract_environment_variables(self):
+    def test_extract_environment_variables(self, parser):
         """Test extracting environment variables from parsed compose"""
         compose_data = {
             'services': {
@@ -106,7 +161,7 @@ services:
             }
         }
         
-        env_vars = self.parser.extract_environment(compose_data)
+        env_vars = parser.extract_environment(compose_data)
         
         assert 'DATABASE_URL' in env_vars
         assert 'DEBUG' in env_vars
@@ -118,7 +173,7 @@ services:
         assert env_vars['DEBUG'] == 'true'
         assert env_vars['WORKER_TIMEOUT'] == '30'
     
-    def test_extract_with_service_filter(self):
+    def test_extract_with_service_filter(self, parser):
         """Test extracting environment variables for specific service"""
         compose_data = {
             'services': {
@@ -135,39 +190,30 @@ services:
             }
         }
         
-        env_vars = self.parser.extract_environment(compose_data, service_name='app')
+        env_vars = parser.extract_environment(compose_data, service_name='app')
         
         assert 'APP_ENV' in env_vars
         assert 'POSTGRES_USER' not in env_vars
     
-    def test_parse_nonexistent_file(self):
+    def test_parse_nonexistent_file(self, parser):
         """Test parsing non-existent file raises error"""
         with pytest.raises(ComposeParseError, match="File not found"):
-            self.parser.parse_file("/nonexistent/docker-compose.yml")
+            parser.parse_file("/nonexistent/docker-compose.yml")
     
-    def test_parse_invalid_yaml(self):
+    def test_parse_invalid_yaml(self, parser, write_compose):
         """Test parsing invalid YAML raises error"""
-        invalid_yaml = """
-version: '3.8'
-services:
-  app:
-    image: myapp
-    environment:
-      - INVALID_YAML: [unclosed bracket
-"""
-        compose_file = Path(self.temp_dir) / "invalid-compose.yml"
-        compose_file.write_text(invalid_yaml)
+        compose_file = write_compose(INVALID_COMPOSE, "invalid-compose.yml")
         
         with pytest.raises(ComposeParseError, match="Invalid YAML"):
-            self.parser.parse_file(str(compose_file))
+            parser.parse_file(compose_file)
     
-    def test_extract_from_env_files(self):
+    def test_extract_from_env_files(self, parser, temp_dir, write_compose):
         """Test extracting environment variables from referenced env files"""
         # Create env files
-        env_file1 = Path(self.temp_dir) / ".env"
+        env_file1 = temp_dir / ".env"
         env_file1.write_text("DATABASE_URL=postgres://localhost:5432/db\nDEBUG=true\n")
         
-        env_file2 = Path(self.temp_dir) / ".env.local"
+        env_file2 = temp_dir / ".env.local"
         env_file2.write_text("API_KEY=secret123\nDEBUG=false\n")  # DEBUG should override
         
         compose_content = f"""
@@ -181,10 +227,9 @@ services:
     environment:
       - NODE_ENV=production
 """
-        compose_file = Path(self.temp_dir) / "docker-compose.yml"
-        compose_file.write_text(compose_content)
+        compose_file = write_compose(compose_content)
         
-        env_vars = self.parser.extract_environment_from_file(str(compose_file))
+        env_vars = parser.extract_environment_from_file(compose_file)
         
         assert 'DATABASE_URL' in env_vars
         assert 'DEBUG' in env_vars
@@ -195,52 +240,33 @@ services:
         assert env_vars['DEBUG'] == 'false'  # from .env.local
         assert env_vars['NODE_ENV'] == 'production'  # from environment
     
-    def test_resolve_variable_substitution(self):
+    def test_resolve_variable_substitution(self, parser):
         """Test resolving variable substitution with defaults"""
         env_vars = {
             'EXISTING_VAR': 'existing_value'
         }
         
         # Test with existing variable
-        result = self.parser.resolve_variable('${EXISTING_VAR}', env_vars)
+        result = parser.resolve_variable('${EXISTING_VAR}', env_vars)
         assert result == 'existing_value'
         
         # Test with default value
-        result = self.parser.resolve_variable('${MISSING_VAR:-default_value}', env_vars)
+        result = parser.resolve_variable('${MISSING_VAR:-default_value}', env_vars)
         assert result == 'default_value'
         
         # Test with missing variable and no default
-        result = self.parser.resolve_variable('${MISSING_VAR}', env_vars)
+        result = parser.resolve_variable('${MISSING_VAR}', env_vars)
         assert result == '${MISSING_VAR}'  # Should remain unresolved
         
         # Test non-variable string
-        result = self.parser.resolve_variable('plain_string', env_vars)
+        result = parser.resolve_variable('plain_string', env_vars)
         assert result == 'plain_string'
     
-    def test_multiple_services_extraction(self):
+    def test_multiple_services_extraction(self, parser, write_compose):
         """Test extracting environment from multiple services"""
-        compose_content = """
-version: '3.8'
-services:
-  web:
-    image: nginx
-    environment:
-      - NGINX_PORT=80
-  app:
-    image: myapp
-    environment:
-      - APP_ENV=production
-      - DATABASE_URL=postgresql://db:5432/app
-  db:
-    image: postgres
-    environment:
-      POSTGRES_USER: admin
-      POSTGRES_PASSWORD: secret
-"""
-        compose_file = Path(self.temp_dir) / "docker-compose.yml"
-        compose_file.write_text(compose_content)
+        compose_file = write_compose(MULTI_SERVICE_COMPOSE)
         
-        env_vars = self.parser.extract_environment_from_file(str(compose_file))
+        env_vars = parser.extract_environment_from_file(compose_file)
         
         # Should include variables from all services
         assert 'NGINX_PORT' in env_vars
@@ -249,9 +275,9 @@ services:
         assert 'POSTGRES_USER' in env_vars
         assert 'POSTGRES_PASSWORD' in env_vars
     
-    def test_parse_compose_with_extends(self):
+    def test_parse_compose_with_extends(self, parser, temp_dir, write_compose):
         """Test parsing compose file with extends (basic support)"""
-        base_compose = Path(self.temp_dir) / "docker-compose.base.yml"
+        base_compose = temp_dir / "docker-compose.base.yml"
         base_compose.write_text("""
 version: '3.8'
 services:
@@ -271,48 +297,27 @@ services:
     environment:
       - OVERRIDE_ENV=override_value
 """
-        compose_file = Path(self.temp_dir) / "docker-compose.yml"
-        compose_file.write_text(compose_content)
+        compose_file = write_compose(compose_content)
         
         # Note: Full extends support might be complex, 
         # for now just ensure it doesn't crash
-        result = self.parser.parse_file(str(compose_file))
+        result = parser.parse_file(compose_file)
         assert 'services' in result
-    
-    def teardown_method(self):
-        """Clean up test fixtures"""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
 
 
 class TestComposeEnvironmentIntegration:
     """Test integration with environment loading"""
     
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.parser = ComposeParser()
-        self.temp_dir = tempfile.mkdtemp()
-    
-    def test_load_environment_with_current_env(self):
+    def test_load_environment_with_current_env(self, parser, write_compose):
         """Test loading environment with current process environment"""
         # Set some environment variables
         os.environ['TEST_VAR'] = 'test_value'
         os.environ['DB_PASSWORD'] = 'secret'
         
-        compose_content = """
-version: '3.8'
-services:
-  app:
-    environment:
-      - TEST_VAR=${TEST_VAR}
-      - DB_PASSWORD=${DB_PASSWORD}
-      - DEFAULT_VAR=${MISSING_VAR:-default}
-"""
-        compose_file = Path(self.temp_dir) / "docker-compose.yml"
-        compose_file.write_text(compose_content)
+        compose_file = write_compose(CURRENT_ENV_COMPOSE)
         
-        env_vars = self.parser.extract_environment_from_file(
-            str(compose_file), 
+        env_vars = parser.extract_environment_from_file(
+            compose_file, 
             resolve_variables=True
         )
         
@@ -324,7 +329,7 @@ services:
         del os.environ['TEST_VAR']
         del os.environ['DB_PASSWORD']
     
-    def test_priority_order(self):
+    def test_priority_order(self, parser, temp_dir, write_compose):
         """Test that environment variables follow correct priority order"""
         # 1. Process environment (highest)
         # 2. compose environment section
@@ -332,7 +337,7 @@ services:
         
         os.environ['PRIORITY_TEST'] = 'process_env'
         
-        env_file = Path(self.temp_dir) / ".env"
+        env_file = temp_dir / ".env"
         env_file.write_text("PRIORITY_TEST=env_file\nENV_FILE_ONLY=from_env_file\n")
         
         compose_content = f"""
@@ -345,11 +350,10 @@ services:
       - PRIORITY_TEST=compose_env
       - COMPOSE_ONLY=from_compose
 """
-        compose_file = Path(self.temp_dir) / "docker-compose.yml"
-        compose_file.write_text(compose_content)
+        compose_file = write_compose(compose_content)
         
-        env_vars = self.parser.extract_environment_from_file(
-            str(compose_file),
+        env_vars = parser.extract_environment_from_file(
+            compose_file,
             resolve_variables=True
         )
         
@@ -362,8 +366,3 @@ services:
         
         # Clean up
         del os.environ['PRIORITY_TEST']
-    
-    def teardown_method(self):
-        """Clean up test fixtures"""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
\ No newline at end of file
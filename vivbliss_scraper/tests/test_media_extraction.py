@@ -224,6 +224,26 @@ class TestMediaExtraction(unittest.TestCase):
             for url in invalid_video_urls:
                 self.assertFalse(self.media_validator.is_valid_video_url(url), f"Should be invalid: {url}")
 
+    def test_filter_valid_media_urls(self):
+        """测试批量筛选媒体URL"""
+        urls = [
+            "https://example.com/image.JPG?size=large",
+            "https://example.com/video.mp4",
+            "https://youtube.com/embed/abc123",
+            "https://example.com/document.pdf",
+            "invalid-url",
+            ""
+        ]
+        
+        self.assertEqual(
+            self.media_validator.filter_valid_images(urls),
+            ["https://example.com/image.JPG?size=large"]
+        )
+        self.assertEqual(
+            self.media_validator.filter_valid_videos(urls),
+            ["https://example.com/video.mp4", "https://youtube.com/embed/abc123"]
+        )
+
     # ============ 集成测试 ============
     
     def test_media_extraction_integration(self):
@@ -4,11 +4,6 @@
 """
 
 import unittest
-import sys
-import os
-
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 try:
     from scrapy.http import HtmlResponse, Request
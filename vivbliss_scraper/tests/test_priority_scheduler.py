@@ -5,11 +5,6 @@
 
 import unittest
 from unittest.mock import Mock, patch
-import sys
-import os
-
-# 添加项目路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 try:
     from scrapy import Request
@@ -7,14 +7,9 @@
 
 import unittest
 from unittest.mock import Mock, patch, MagicMock
-import sys
-import os
 import re
 from datetime import datetime
 
-# 添加项目路径到 sys.path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
 # 尝试导入 scrapy 模块，如果失败则创建模拟对象
 try:
     import scrapy
@@ -453,9 +448,7 @@ class TestProductDiscoveryFunctionality(unittest.TestCase):
         all_product_links = set()
         
         for selector in product_selectors:
-            links = self.response.css(selector + '::attr(href)').getall()
-            for link in links:
-                all_product_links.add(link)
+            all_product_links.update(self.response.css(selector + '::attr(href)').getall())
         
         self.assertGreater(len(all_product_links), 3, "应该发现多个产品链接")
         
@@ -6,7 +6,9 @@
 
 import sys
 import os
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _THIS_DIR not in sys.path:
+    sys.path.insert(0, _THIS_DIR)
 
 from vivbliss_scraper.utils.priority_scheduler import (
     DirectoryTracker, PriorityRequestQueue, DirectoryPriorityScheduler
@@ -17,6 +17,10 @@ except ImportError:
     print("⚠️  Pyrogram 未安装，Bot通知功能将被禁用")
 
 
+# 表示启用的布尔字符串（小写）；其余取值（false/0/no/off/disabled/空串及无效值）均视为禁用
+_TRUE_VALUES = frozenset({'true', '1', 'yes', 'on', 'enabled'})
+
+
 class BotNotifier:
     """Bot消息通知器类"""
     
@@ -297,18 +301,8 @@ class BotNotifier:
         if not isinstance(value, str):
             return bool(value)
         
-        value = value.strip().lower()
-        
-        # True values
-        if value in ('true', '1', 'yes', 'on', 'enabled'):
-            return True
-        
-        # False values
-        if value in ('false', '0', 'no', 'off', 'disabled', ''):
-            return False
-        
-        # For invalid values, default to False for safety
-        return False
+        # 只做一次规范化和一次集合查找；无效值出于安全考虑视为False
+        return value.strip().lower() in _TRUE_VALUES
     
     def is_enabled(self) -> bool:
         """检查通知是否启用"""
@@ -13,6 +13,11 @@ from scrapy.http import Response
 import time
 
 
+def _suffix_pattern(extensions) -> re.Pattern:
+    """把扩展名集合编译为一个匹配路径结尾的交替正则"""
+    return re.compile('(?:%s)$' % '|'.join(re.escape(ext) for ext in sorted(extensions)), re.IGNORECASE)
+
+
 class MediaValidator:
     """媒体URL验证器"""
     
@@ -32,6 +37,12 @@ class MediaValidator:
         'twitch.tv', 'tiktok.com', 'bilibili.com'
     }
     
+    # 扩展名与关键词检查各编译为一个正则，每个URL只需一次匹配
+    _IMAGE_EXT_RE = _suffix_pattern(SUPPORTED_IMAGE_FORMATS)
+    _VIDEO_EXT_RE = _suffix_pattern(SUPPORTED_VIDEO_FORMATS)
+    _IMAGE_KEYWORD_RE = re.compile('image|img|photo|picture|thumbnail|avatar', re.IGNORECASE)
+    _VIDEO_KEYWORD_RE = re.compile('video|movie|film|clip|media|embed', re.IGNORECASE)
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.session = requests.Session()
@@ -51,13 +62,11 @@ class MediaValidator:
                 return False
             
             # 检查文件扩展名
-            path = parsed.path.lower()
-            if any(path.endswith(ext) for ext in self.SUPPORTED_IMAGE_FORMATS):
+            if self._IMAGE_EXT_RE.search(parsed.path):
                 return True
             
             # 检查是否包含图片关键词
-            image_keywords = ['image', 'img', 'photo', 'picture', 'thumbnail', 'avatar']
-            if any(keyword in url.lower() for keyword in image_keywords):
+            if self._IMAGE_KEYWORD_RE.search(url):
                 return True
             
             return False
@@ -83,13 +92,11 @@ class MediaValidator:
                 return True
             
             # 检查文件扩展名
-            path = parsed.path.lower()
-            if any(path.endswith(ext) for ext in self.SUPPORTED_VIDEO_FORMATS):
+            if self._VIDEO_EXT_RE.search(parsed.path):
                 return True
             
             # 检查是否包含视频关键词
-            video_keywords = ['video', 'movie', 'film', 'clip', 'media', 'embed']
-            if any(keyword in url.lower() for keyword in video_keywords):
+            if self._VIDEO_KEYWORD_RE.search(url):
                 return True
             
             return False
@@ -98,6 +105,14 @@ class MediaValidator:
             self.logger.error(f"验证视频URL时出错: {url}, 错误: {e}")
             return False
     
+    def filter_valid_images(self, urls: List[str]) -> List[str]:
+        """批量筛选有效的图片URL，保持原有顺序"""
+        return [url for url in urls if self.is_valid_image_url(url)]
+    
+    def filter_valid_videos(self, urls: List[str]) -> List[str]:
+        """批量筛选有效的视频URL，保持原有顺序"""
+        return [url for url in urls if self.is_valid_video_url(url)]
+    
     def check_url_accessibility(self, url: str, timeout: int = 5) -> bool:
         """检查URL是否可访问"""
         try:
@@ -0,0 +1,67 @@
+"""
+MongoDB 连接辅助工具模块
+
+scripts/health_check.py、scripts/wait_for_mongo.py 和 test_mongo_auth.py 共用的
+URI 处理和存活探测函数。
+"""
+import re
+from typing import Any, Dict
+
+# 匹配 URI 中的认证部分，用于日志输出时隐藏密码
+_AUTH_RE = re.compile(r'(mongodb(?:\+srv)?://[^:@/]+:)[^@]+(@)')
+
+# 服务器不认识该命令时返回的错误码（CommandNotFound）
+_COMMAND_NOT_FOUND = 59
+
+
+def mask_uri(uri: str) -> str:
+    """隐藏 URI 中的密码"""
+    return _AUTH_RE.sub(r'\1****\2', uri)
+
+
+def use_direct_connection(uri: str) -> bool:
+    """
+    判断是否可以直连单个节点
+    
+    单节点部署直连可跳过副本集成员发现；副本集、SRV 和多主机 URI 需要完整的拓扑发现。
+    """
+    if uri.startswith('mongodb+srv') or 'replicaSet=' in uri:
+        return False
+    hosts = uri.split('://', 1)[-1].split('/', 1)[0].rsplit('@', 1)[-1]
+    return ',' not in hosts
+
+
+def create_client(uri: str, appname: str, **options):
+    """
+    创建 MongoClient
+    
+    单节点 URI 自动直连；appname 会出现在服务器日志中，用于区分调用方。
+    其余参数（超时、事件监听器等）原样传给 MongoClient。
+    """
+    # 延迟导入，只在真正需要连接时才加载 pymongo
+    import pymongo
+    
+    return pymongo.MongoClient(
+        uri,
+        appname=appname,
+        directConnection=use_direct_connection(uri),
+        **options
+    )
+
+
+def hello(client) -> Dict[str, Any]:
+    """
+    发送 hello 命令检查服务器是否存活
+    
+    hello 不需要认证，受限用户也能执行；只有旧版本服务器（< 4.4.2）不认识该命令时
+    才回退到 ismaster，认证失败等其他错误照常抛出。
+    """
+    # 延迟导入，只在真正需要连接时才加载 pymongo
+    from pymongo.errors import OperationFailure
+    
+    try:
+        return client.admin.command('hello')
+    except OperationFailure as e:
+        if e.code != _COMMAND_NOT_FOUND:
+            raise
+        return client.admin.command('ismaster')